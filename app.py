@@ -1,91 +1,28 @@
+import time
+_run_started = time.perf_counter()
+
 import streamlit as st
 st.set_page_config(page_title="Campus Navigator", page_icon="🎓", layout="wide")
 
-import pandas as pd
-import networkx as nx
-from PIL import Image
-import json
-import time
-import plotly.graph_objects as go
+# PIL (via map_assets) is imported only by the map view, so a rerun only pays
+# for the view that is actually shown.
 from pages.class_finder import class_finder
 from pages.canteen_menu import canteen_menu
 from pages.faculty_room import faculty_room
 from pages.department_office import department_office
 from pages.administration import administration
 from pages.parking_info import parking_info
-
-# Building and paths data remains the same as in your original file
-BUILDINGS = {
-    "Gate": {"location": "Main Entrance", "facilities": ["Security Post", "Information Desk"]},
-    "CSE1": {"location": "Near Saraswat Statue", "facilities": ["Labs", "Classrooms", "Faculty Rooms"]},
-    "CSE2": {"location": "Adjacent to CSE1", "facilities": ["Labs", "Classrooms"]},
-    "ECE1": {"location": "North Wing", "facilities": ["Labs", "Classrooms"]},
-    "ECE2": {"location": "Near Admin Block", "facilities": ["Labs", "Classrooms"]},
-    "EEE": {"location": "Near Mechanical Block", "facilities": ["Labs", "Classrooms"]},
-    "MECH": {"location": "West Wing", "facilities": ["Workshop", "Labs", "Classrooms"]},
-    "CIVIL": {"location": "Southwest Wing", "facilities": ["Labs", "Classrooms"]},
-    "AIML": {"location": "Near Civil Block", "facilities": ["AI Lab", "Classrooms"]},
-    "Administration": {"location": "Central Block", "facilities": ["Office", "Meeting Rooms"]},
-    "Polytechnic": {"location": "Near ECE2", "facilities": ["Classrooms", "Labs"]},
-    "BSH": {"location": "Near Polytechnic", "facilities": ["Basic Sciences Labs", "Classrooms"]},
-    "Placements": {"location": "Near Gate", "facilities": ["Interview Rooms", "Training Hall"]},
-    "Pharmacy": {"location": "Near Boys Hostel", "facilities": ["Labs", "Classrooms"]},
-    "Boys Hostel": {"location": "East Wing", "facilities": ["Rooms", "Mess"]},
-    "Girls Hostel": {"location": "South Wing", "facilities": ["Rooms", "Mess"]},
-    "Basketball Court": {"location": "Near Pharmacy", "facilities": ["Court"]},
-    "Sports Area": {"location": "Near Boys Hostel", "facilities": ["Grounds", "Equipment Room"]},
-    "Canteen": {"location": "Near Bus Area", "facilities": ["Food Court", "Seating Area"]},
-    "Bus Area": {"location": "South End", "facilities": ["Parking", "Waiting Area"]},
-    "CAI": {"location": "Near Girls Hostel", "facilities": ["Computer Labs"]}
-}
-
-
-PATHS = {
-    ("Gate", "Placements"): {"distance": 50, "covered": True},
-    ("Gate", "Basketball Court"): {"distance": 30, "covered": False},
-    ("CSE1", "CSE2"): {"distance": 20, "covered": True},
-    ("CSE1", "EEE"): {"distance": 25, "covered": True},
-    ("CSE1", "ECE1"): {"distance": 35, "covered": True},
-    ("ECE1", "ECE2"): {"distance": 40, "covered": True},
-    ("ECE2", "Administration"): {"distance": 30, "covered": True},
-    ("ECE2", "Polytechnic"): {"distance": 25, "covered": True},
-    ("EEE", "MECH"): {"distance": 20, "covered": True},
-    ("EEE", "AIML"): {"distance": 25, "covered": True},
-    ("MECH", "CIVIL"): {"distance": 30, "covered": True},
-    ("CIVIL", "AIML"): {"distance": 25, "covered": True},
-    ("AIML", "CAI"): {"distance": 40, "covered": True},
-    ("CAI", "Girls Hostel"): {"distance": 35, "covered": True},
-    ("CAI", "Bus Area"): {"distance": 45, "covered": False},
-    ("Polytechnic", "BSH"): {"distance": 20, "covered": True},
-    ("BSH", "Placements"): {"distance": 35, "covered": True},
-    ("Placements", "Basketball Court"): {"distance": 25, "covered": False},
-    ("Basketball Court", "Boys Hostel"): {"distance": 30, "covered": False},
-    ("Basketball Court", "Sports Area"): {"distance": 35, "covered": False},
-    ("Boys Hostel", "Sports Area"): {"distance": 25, "covered": False},
-    ("Boys Hostel", "Pharmacy"): {"distance": 20, "covered": True}
-}
-
-
-class CampusNavigator:
-    def __init__(self):
-        self.graph = self._build_graph()
-        
-    def _build_graph(self):
-        G = nx.Graph()
-        for (start, end), attrs in PATHS.items():
-            G.add_edge(start, end, **attrs)
-        return G
-    
-    def find_path(self, start, end, preference):
-        if preference == "Shortest":
-            return nx.shortest_path(self.graph, start, end, weight="distance")
-        else:  # Covered Pathway
-            def covered_weight(u, v, d):
-                return 1 if d["covered"] else 2
-            return nx.shortest_path(self.graph, start, end, weight=covered_weight)
-        
+from campus_data import BUILDING_TYPES, BUILDINGS
+from campus_figure import route_figure
+from congestion import campus_now
+from directory import get_directory
+from map_assets import MAP_IMAGE, load_map
+from metrics import enabled as metrics_enabled, log_snapshot, snapshot, span, timed
+from navigator import PREFERENCE_LABELS, NoRoute, get_navigator
+from run_timing import record_run, timing_report
 
 
+@timed()
 def show_custom_header():
     st.markdown("""
         <div class="custom-header">
@@ -96,6 +33,7 @@ def show_custom_header():
         
 
 # Add custom CSS for enhanced styling
+@timed()
 def add_custom_css():
     st.markdown("""
         <style>
@@ -276,6 +214,9 @@ body::before {
             border: 2px solid rgba(255, 255, 255, 0.25);
             position: relative;
         }
+        .building-card + .building-card {
+            margin-top: 1rem;
+        }
         .building-card:hover {
             transform: translateY(-5px) scale(1.05);
             box-shadow: 0 8px 20px rgba(255, 255, 255, 0.25);
@@ -316,13 +257,23 @@ body::before {
 
 
 
+def client_map_width():
+    """Map width to serve: phones get a smaller variant than desktops."""
+    user_agent = st.context.headers.get("User-Agent", "")
+    return 960 if "Mobi" in user_agent else 1600
+
+
+@timed()
 def show_campus_map():
     st.header("📍 Campus Map")
     try:
-        image = Image.open("D:\\routingpath\\image.png")
-        st.image(image, caption="Sri Vasavi Engineering College Route Map", use_container_width=True)
-    except:
-        st.error("Campus map image not found. Please ensure the image file is in the correct location.")
+        campus_map = load_map()
+    except OSError:
+        st.error(f"Campus map image not found. Please ensure {MAP_IMAGE.name} is next to app.py.")
+        return
+    full = st.toggle("Full resolution", value=False)
+    variant = campus_map.variants[-1] if full else campus_map.for_width(client_map_width())
+    st.image(variant.data, caption="Sri Vasavi Engineering College Route Map", use_container_width=True)
 
 
 def show_loading_animation():
@@ -334,6 +285,7 @@ def show_loading_animation():
     """, unsafe_allow_html=True)
 
 
+@timed()
 def show_enhanced_navigation():
     st.markdown("""
         <h2 style='text-align: center; color: #1e3c72;'>🚶‍♂️ Interactive Campus Navigation</h2>
@@ -349,108 +301,187 @@ def show_enhanced_navigation():
         end = st.selectbox("Where do you want to go?", 
                           [b for b in BUILDINGS.keys() if b != start],
                           format_func=lambda x: f"🎯 {x}")
+        plan = get_navigator().floor_plans.get(end)
+        room = None
+        if plan is not None:
+            room = st.selectbox("Room (optional)", [None] + list(plan.rooms), key="room",
+                                format_func=lambda x: "🚪 Building entrance" if x is None else f"🚪 {x}")
     
-    route_preference = st.radio("How would you like to get there?",
-                              ["⚡ Shortest Route", "☔ Covered Pathway"],
-                              format_func=lambda x: x.split(" ", 1)[1])
+    preference = st.radio("How would you like to get there?", list(PREFERENCE_LABELS),
+                          format_func=PREFERENCE_LABELS.get)
+    if "departure" not in st.session_state:
+        # time_input would default to the server's clock, which need not be
+        # on campus time.
+        st.session_state.departure = campus_now()
+    departure = st.time_input("Leaving at", key="departure", step=600)
     
+    show_nearest_facility(start, preference)
+
     if st.button("Find My Way!", type="primary"):
-        show_loading_animation()
-        time.sleep(1)  # Simulate loading
-        
-        navigator = CampusNavigator()
+        started = time.perf_counter()
+        navigator = get_navigator()
+
+        if not navigator.connected(start, end):
+            st.error("😕 No route found between selected locations!")
+            return
+
+        # Only the first query after a (re)start builds the route table; every
+        # other one is a table walk and needs no spinner.
+        loading = st.empty()
+        if not navigator.route_table_ready(preference, departure):
+            with loading.container():
+                show_loading_animation()
         try:
-            path = navigator.find_path(start, end, "Shortest" if "Shortest" in route_preference else "Covered")
-            
-            # Create an animated path visualization
-            fig = go.Figure()
-            
-            # Add building points
-            x_coords = list(range(len(path)))
-            fig.add_trace(go.Scatter(
-                x=x_coords,
-                y=[0] * len(path),
-                mode='markers+text',
-                name='Buildings',
-                text=path,
-                textposition='top center',
-                marker=dict(size=20, symbol='star', color='gold'),
-            ))
-            
-            # Add path line
-            fig.add_trace(go.Scatter(
-                x=x_coords,
-                y=[0] * len(path),
-                mode='lines',
-                line=dict(width=3, color='royalblue', dash='dot'),
-                name='Path'
-            ))
-            
-            fig.update_layout(
-                title='Your Route Visualization',
-                showlegend=False,
-                plot_bgcolor='white',
-                height=300,
-                margin=dict(l=20, r=20, t=40, b=20)
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Show step-by-step directions with animation
-            st.markdown("### 📝 Step-by-Step Directions")
-            total_distance = 0
-            
-            for i in range(len(path)-1):
-                path_details = PATHS.get((path[i], path[i+1])) or PATHS.get((path[i+1], path[i]))
-                distance = path_details["distance"]
-                covered = path_details["covered"]
-                total_distance += distance
-                
-                with st.container():
-                    st.markdown(f"""
-                        <div class="building-card">
-                            <h4>Step {i+1}</h4>
-                            <p>🚶‍♂️ From <b>{path[i]}</b> to <b>{path[i+1]}</b></p>
-                            <p>📏 Distance: {distance}m | 🌂 Covered Path: {'Yes' if covered else 'No'}</p>
-                        </div>
-                    """, unsafe_allow_html=True)
-            
-            st.success(f"🎉 Total distance: {total_distance} meters")
-            
-            # Show destination details
-            st.markdown("### 📍 Destination Details")
-            dest_details = BUILDINGS[end]
-            st.markdown(f"""
-                <div class="building-card" style='background: linear-gradient(45deg, #2193b0, #6dd5ed); color: white;'>
-                    <h3>{end}</h3>
-                    <p>📌 Location: {dest_details['location']}</p>
-                    <p>🏢 Facilities: {', '.join(dest_details['facilities'])}</p>
+            path = navigator.find_path(start, room or end, preference, departure)
+        except NoRoute:
+            # Connected places can still be out of reach for a preference,
+            # e.g. an upstairs room for step-free routes.
+            loading.empty()
+            st.error(f"😕 No {PREFERENCE_LABELS[preference].lower()} route to {room or end}!")
+            return
+        loading.empty()
+        computed = time.perf_counter()
+
+        # The campus is drawn once per process; each query only adds its
+        # route as an overlay trace.
+        fig = route_figure(navigator, path)
+
+        # Build every step card first and send them as a single element
+        # instead of one container and markdown block per step.
+        steps = []
+        for i, leg in enumerate(path.legs):
+            steps.append(f"""
+                <div class="building-card">
+                    <h4>Step {i+1}</h4>
+                    <p>🚶‍♂️ From <b>{leg.start}</b> to <b>{leg.end}</b></p>
+                    <p>📏 Distance: {leg.distance:g}m | 🌂 Covered Path: {'Yes' if leg.covered else 'No'}</p>
                 </div>
-            """, unsafe_allow_html=True)
-            
-        except nx.NetworkXNoPath:
-            st.error("😕 No route found between selected locations!")
+            """)
+
+        dest_details = BUILDINGS[end]
+        destination = f"""
+            <div class="building-card" style='background: linear-gradient(45deg, #2193b0, #6dd5ed); color: white;'>
+                <h3>{end}{f" · Room {room}" if room else ""}</h3>
+                <p>📌 Location: {dest_details['location']}</p>
+                <p>🏢 Facilities: {', '.join(dest_details['facilities'])}</p>
+            </div>
+        """
 
+        with span("plotly_chart"):
+            st.plotly_chart(fig, use_container_width=True)
+        st.markdown("### 📝 Step-by-Step Directions")
+        st.markdown("".join(steps), unsafe_allow_html=True)
+        st.success(f"🎉 Total distance: {path.distance:g} meters")
+        feels_like = navigator.effective_distance(path, departure)
+        if feels_like > path.distance:
+            st.warning(f"🚦 Busy at {departure:%H:%M}: expect it to take as long as {feels_like:g} meters usually would")
+        # Both search between the buildings without congestion, so with a
+        # room or a busy departure they would describe a different trip.
+        if room is None and not navigator.congested(departure):
+            show_route_options(navigator, start, end)
+            show_alternative_routes(navigator, path, preference)
+        st.markdown("### 📍 Destination Details")
+        st.markdown(destination, unsafe_allow_html=True)
+
+        rendered = time.perf_counter()
+        st.caption(
+            f"⏱️ Route found in {(computed - started) * 1000:.1f} ms, "
+            f"page built in {(rendered - computed) * 1000:.1f} ms"
+        )
+
+@timed()
+def show_nearest_facility(start, preference):
+    navigator = get_navigator()
+    facilities = sorted(navigator.facility_index.holders)
+    with st.expander("🔎 Nearest facility from here"):
+        facility = st.selectbox("Looking for", facilities, key="facility")
+        route = navigator.nearest_facility(start, facility, preference)
+        if route is None:
+            st.info(f"No {facility} can be reached from {start}.")
+        elif route.end == start:
+            st.info(f"{start} has {facility}.")
+        else:
+            st.markdown(f"**{route.end}** is {route.distance:g} m away: {' → '.join(route)}")
+
+
+def describe_option(route, shortest):
+    """Short label for a route relative to the shortest one, e.g. "+40 m, stays dry"."""
+    in_open = route.distance - route.covered
+    weather = "stays dry" if in_open == 0 else f"{in_open:g} m in the open"
+    if route is shortest:
+        return f"Shortest: {route.distance:g} m, {weather}"
+    return f"+{route.distance - shortest.distance:g} m, {weather}"
+
+
+@timed()
+def show_route_options(navigator, start, end):
+    # The Pareto front: every route that is either shorter or drier than all
+    # the others, from the shortest to the driest.
+    options = navigator.pareto_routes(start, end)
+    if len(options) < 2:
+        return
+    shortest = options[0]
+    st.markdown("### 🌦️ Other Options")
+    st.markdown("\n".join(
+        f"- **{describe_option(route, shortest)}**: {' → '.join(route)}"
+        for route in options
+    ))
+
+
+@timed()
+def show_alternative_routes(navigator, path, preference):
+    # Fallbacks for when the best route is blocked by construction or crowds.
+    # Yen's first route can be a different one of equal cost, so the route
+    # shown is filtered out rather than the first one dropped.
+    routes = navigator.alternative_routes(path.start, path.end, preference, k=4)
+    alternatives = [route for route in routes if route != path][:3]
+    if not alternatives:
+        return
+    with st.expander("🔀 Alternative routes"):
+        st.markdown("\n".join(
+            f"- **{route.distance:g} m** ({route.covered:g} m covered): {' → '.join(route)}"
+            for route in alternatives
+        ))
+
+
+# Most cards the directory shows for one search.
+SEARCH_RESULTS = 30
+
+
+def search_directory(key):
+    """Search box over the directory; the matching entries, or ``None`` when empty."""
+    query = st.text_input("🔎 Search buildings, rooms and facilities", key=key,
+                          placeholder="e.g. CSE1-104, labs, hostel")
+    if not query.strip():
+        return None
+    matches = get_directory().search(query)
+    if not matches:
+        st.info(f"Nothing in the directory matches “{query}”.")
+    elif len(matches) > SEARCH_RESULTS:
+        st.caption(f"Showing the best {SEARCH_RESULTS} of {len(matches)} matches")
+    return matches[:SEARCH_RESULTS]
+
+
+@timed()
 def show_building_info():
     st.header("🏢 Building Information")
-    
-    building_types = {
-        "Academic Blocks": ["CSE1", "CSE2", "ECE1", "ECE2", "EEE", "MECH", "CIVIL", "AIML", "BSH", "Polytechnic", "Pharmacy"],
-        "Administrative": ["Administration", "Placements", "CAI"],
-        "Hostels": ["Boys Hostel", "Girls Hostel"],
-        "Sports & Recreation": ["Basketball Court", "Sports Area", "Canteen"],
-        "Other": ["Gate", "Bus Area"]
-    }
-    
-    for type_name, buildings in building_types.items():
+
+    matches = search_directory("building_search")
+    if matches is not None:
+        groups = {"Search results": matches}
+    else:
+        directory = get_directory()
+        groups = {kind: [directory.by_name[name] for name in names] for kind, names in BUILDING_TYPES.items()}
+
+    for type_name, entries in groups.items():
         st.subheader(type_name)
         cols = st.columns(3)
-        for i, building in enumerate(buildings):
+        for i, entry in enumerate(entries):
             with cols[i % 3]:
-                st.write(f"**{building}**")
-                details = BUILDINGS[building]
-                st.write(f"Location: {details['location']}")
-                st.write(f"Facilities: {', '.join(details['facilities'])}")
+                st.write(f"**{entry.name}**")
+                st.write(f"Location: {entry.location}")
+                if entry.facilities:
+                    st.write(f"Facilities: {', '.join(entry.facilities)}")
 
 def handle_navigation(user_type):
     """Handle quick links based on user type"""
@@ -481,35 +512,34 @@ def handle_navigation(user_type):
             if st.button("🅿️ Parking Area", use_container_width=True):
                 st.session_state.page = "parking"
 
+@timed()
 def show_enhanced_building_info():
     st.markdown("""
         <h2 style='text-align: center; color: #1e3c72;'>🏢 Campus Buildings Directory</h2>
     """, unsafe_allow_html=True)
     
-    building_types = {
-        "Academic Blocks": ["CSE1", "CSE2", "ECE1", "ECE2", "EEE", "MECH", "CIVIL", "AIML", "BSH", "Polytechnic", "Pharmacy"],
-        "Administrative": ["Administration", "Placements", "CAI"],
-        "Hostels": ["Boys Hostel", "Girls Hostel"],
-        "Sports & Recreation": ["Basketball Court", "Sports Area", "Canteen"],
-        "Other": ["Gate", "Bus Area"]
-    }
-    
-    for type_name, buildings in building_types.items():
+    directory = get_directory()
+    matches = search_directory("directory_search")
+    if matches is not None:
+        show_cards(directory, matches)
+        return
+
+    for type_name, names in BUILDING_TYPES.items():
         st.markdown(f"""
             <h3 style='color: #1e3c72; margin-top: 2rem;'>{type_name}</h3>
         """, unsafe_allow_html=True)
-        
-        cols = st.columns(3)
-        for i, building in enumerate(buildings):
-            with cols[i % 3]:
-                details = BUILDINGS[building]
-                st.markdown(f"""
-                    <div class="building-card" style='height: 100%;'>
-                        <h4>{building}</h4>
-                        <p>📍 {details['location']}</p>
-                        <p>🏢 {', '.join(details['facilities'])}</p>
-                    </div>
-                """, unsafe_allow_html=True)
+        show_cards(directory, [directory.by_name[name] for name in names])
+
+
+def show_cards(directory, entries):
+    # One markdown element per column rather than per card: the cards' HTML
+    # is cached, and fewer elements means less to diff on every rerun.
+    if not entries:
+        return
+    for i, col in enumerate(st.columns(3)):
+        with col:
+            st.markdown("".join(directory.card_html(entry) for entry in entries[i::3]),
+                        unsafe_allow_html=True)
 
 
 def main():
@@ -566,18 +596,16 @@ def main():
     
     # Main content
     if st.session_state.page == "home":
-        tab1, tab2, tab3 = st.tabs([
-            "📍 Campus Map",
-            "🚶‍♂️ Navigation",
-            "🏢 Building Info"
-        ])
-        
-        with tab1:
-            show_campus_map()
-        with tab2:
-            show_enhanced_navigation()
-        with tab3:
-            show_enhanced_building_info()
+        # Only the selected view is rendered; st.tabs would build all three
+        # on every rerun.
+        views = {
+            "📍 Campus Map": show_campus_map,
+            "🚶‍♂️ Navigation": show_enhanced_navigation,
+            "🏢 Building Info": show_enhanced_building_info,
+        }
+        view = st.radio("View", list(views), horizontal=True,
+                        label_visibility="collapsed", key="view")
+        views[view]()
     
     elif st.session_state.page == "class_finder":
         class_finder()
@@ -592,5 +620,25 @@ def main():
     elif st.session_state.page == "parking":
         parking_info()
 
+    show_run_timing()
+
+
+def show_run_timing():
+    record_run(_run_started)
+    report = timing_report()
+    mean = report["mean_rerun_s"]
+    with st.sidebar:
+        st.caption(
+            f"⏱️ Cold start {report['cold_start_s'] * 1000:.0f} ms · "
+            f"this run {report['last_run_s'] * 1000:.0f} ms · "
+            f"mean rerun {'–' if mean is None else f'{mean * 1000:.0f} ms'} "
+            f"({report['runs']} runs)"
+        )
+        if metrics_enabled():
+            log_snapshot()
+            with st.expander("📊 Metrics"):
+                st.json(snapshot())
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
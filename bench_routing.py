@@ -0,0 +1,177 @@
+"""Benchmark CampusNavigator on synthetic campuses.
+
+Times graph construction, single ``find_path`` calls for every preference and
+batches of random queries for every backend, and prints the results as JSON::
+
+    python bench_routing.py --sizes 10 1000 --output bench.json
+
+The defaults finish in under a minute.  Large campuses are opt-in
+(``--sizes 100000 1000000``); batches shrink as campuses grow unless
+``--queries`` fixes their size, since the csr and networkx backends run a
+full search per query.
+
+With ``--floors`` every building also gets a floor plan, and room-to-room
+queries are timed as well.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+import networkx as nx
+
+from campus_data import building_layout
+from navigator import BACKENDS, PREFERENCE_WEIGHTS, CampusNavigator, NoRoute
+from synthetic_campus import generate_campus
+
+PREFERENCES = tuple(PREFERENCE_WEIGHTS)
+
+# Queries per batch when --queries is not given: the full batch up to
+# FULL_BATCH_NODES nodes, then fewer for larger campuses, down to MIN_QUERIES.
+FULL_BATCH = 1_000
+FULL_BATCH_NODES = 1_000
+MIN_QUERIES = 20
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def random_pairs(nodes, count, rng):
+    return [tuple(rng.sample(nodes, 2)) for _ in range(count)]
+
+
+def batch_size(n_nodes, queries):
+    if queries is not None:
+        return queries
+    return max(MIN_QUERIES, FULL_BATCH * FULL_BATCH_NODES // max(n_nodes, FULL_BATCH_NODES))
+
+
+def run_batch(navigator, pairs, preference):
+    # Timing of find_path over ``pairs``.  Some pairs have no route for a
+    # preference (no upper floor is step-free); they are counted, not fatal.
+    unreachable = 0
+    start = time.perf_counter()
+    for a, b in pairs:
+        try:
+            navigator.find_path(a, b, preference)
+        except NoRoute:
+            unreachable += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "queries": len(pairs),
+        "unreachable": unreachable,
+        "total_s": elapsed,
+        "per_query_s": elapsed / len(pairs),
+        "queries_per_s": len(pairs) / elapsed if elapsed else None,
+    }
+
+
+def bench_backend(buildings, paths, coordinates, indoor, backend, args, rng):
+    result = {"backend": backend}
+    navigator, result["build_s"] = timed(
+        CampusNavigator, buildings, paths, backend=backend, coordinates=coordinates, indoor=indoor
+    )
+    if backend == "networkx":
+        # build_s also covers the CSR graph and its components, which every
+        # backend uses to reject unconnected pairs; this is the nx.Graph alone.
+        _, result["graph_build_s"] = timed(navigator._build_graph)
+    if indoor:
+        _, result["floor_plans_s"] = timed(lambda: navigator.rooms)
+    if backend == "table":
+        precompute = 0.0
+        for preference in PREFERENCES:
+            _, elapsed = timed(navigator.route_table, preference)
+            precompute += elapsed
+        result["precompute_s"] = precompute
+
+    nodes = list(buildings)
+    queries = batch_size(len(nodes), args.queries)
+    single_pairs = random_pairs(nodes, args.repeat, rng)
+    batch_pairs = random_pairs(nodes, queries, rng)
+    for preference in PREFERENCES:
+        samples = []
+        for start, end in single_pairs:
+            _, elapsed = timed(navigator.find_path, start, end, preference)
+            samples.append(elapsed)
+        result[f"single_{preference.lower()}"] = {
+            "min_s": min(samples),
+            "median_s": statistics.median(samples),
+            "max_s": max(samples),
+        }
+
+        result[f"batch_{preference.lower()}"] = run_batch(navigator, batch_pairs, preference)
+        if indoor:
+            room_pairs = random_pairs(list(navigator.rooms), queries, rng)
+            result[f"rooms_{preference.lower()}"] = run_batch(navigator, room_pairs, preference)
+    return result
+
+
+def bench_size(n_nodes, args):
+    rng = random.Random(args.seed)
+    (buildings, paths, coordinates), generate_s = timed(
+        generate_campus, n_nodes, covered_share=args.covered_share, seed=args.seed
+    )
+    indoor = {
+        name: building_layout(name, args.floors, args.rooms_per_floor) for name in buildings
+    } if args.floors else {}
+    report = {
+        "nodes": len(buildings),
+        "edges": len(paths),
+        "rooms": sum(len(layout["rooms"]) for layout in indoor.values()),
+        "covered_share": args.covered_share,
+        "generate_s": generate_s,
+        "backends": [],
+    }
+    for backend in args.backends:
+        if backend == "table" and n_nodes > args.table_limit:
+            report["backends"].append({"backend": backend, "skipped": "above --table-limit"})
+            continue
+        report["backends"].append(
+            bench_backend(buildings, paths, coordinates, indoor, backend, args, rng)
+        )
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1_000, 10_000])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--covered-share", type=float, default=0.7)
+    parser.add_argument("--queries", type=int,
+                        help=f"random queries per batch (default: {FULL_BATCH}, fewer above {FULL_BATCH_NODES} nodes)")
+    parser.add_argument("--repeat", type=int, default=5, help="single-query samples")
+    parser.add_argument("--table-limit", type=int, default=2_000,
+                        help="largest campus to build all-pairs tables for")
+    parser.add_argument("--floors", type=int, default=0,
+                        help="floors per building; 0 leaves out floor plans")
+    parser.add_argument("--rooms-per-floor", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": platform.python_version(),
+        "networkx": nx.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "sizes": [],
+    }
+    for n_nodes in args.sizes:
+        print(f"benchmarking {n_nodes} nodes...", file=sys.stderr)
+        results["sizes"].append(bench_size(n_nodes, args))
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+BUILDINGS = {
+    "Gate": {"location": "Main Entrance", "facilities": ["Security Post", "Information Desk"]},
+    "CSE1": {"location": "Near Saraswat Statue", "facilities": ["Labs", "Classrooms", "Faculty Rooms"]},
+    "CSE2": {"location": "Adjacent to CSE1", "facilities": ["Labs", "Classrooms"]},
+    "ECE1": {"location": "North Wing", "facilities": ["Labs", "Classrooms"]},
+    "ECE2": {"location": "Near Admin Block", "facilities": ["Labs", "Classrooms"]},
+    "EEE": {"location": "Near Mechanical Block", "facilities": ["Labs", "Classrooms"]},
+    "MECH": {"location": "West Wing", "facilities": ["Workshop", "Labs", "Classrooms"]},
+    "CIVIL": {"location": "Southwest Wing", "facilities": ["Labs", "Classrooms"]},
+    "AIML": {"location": "Near Civil Block", "facilities": ["AI Lab", "Classrooms"]},
+    "Administration": {"location": "Central Block", "facilities": ["Office", "Meeting Rooms"]},
+    "Polytechnic": {"location": "Near ECE2", "facilities": ["Classrooms", "Labs"]},
+    "BSH": {"location": "Near Polytechnic", "facilities": ["Basic Sciences Labs", "Classrooms"]},
+    "Placements": {"location": "Near Gate", "facilities": ["Interview Rooms", "Training Hall"]},
+    "Pharmacy": {"location": "Near Boys Hostel", "facilities": ["Labs", "Classrooms"]},
+    "Boys Hostel": {"location": "East Wing", "facilities": ["Rooms", "Mess"]},
+    "Girls Hostel": {"location": "South Wing", "facilities": ["Rooms", "Mess"]},
+    "Basketball Court": {"location": "Near Pharmacy", "facilities": ["Court"]},
+    "Sports Area": {"location": "Near Boys Hostel", "facilities": ["Grounds", "Equipment Room"]},
+    "Canteen": {"location": "Near Bus Area", "facilities": ["Food Court", "Seating Area"]},
+    "Bus Area": {"location": "South End", "facilities": ["Parking", "Waiting Area"]},
+    "CAI": {"location": "Near Girls Hostel", "facilities": ["Computer Labs"]}
+}
+
+# How the buildings directory groups BUILDINGS, in display order.
+BUILDING_TYPES = {
+    "Academic Blocks": [
+        "CSE1", "CSE2", "ECE1", "ECE2", "EEE", "MECH", "CIVIL", "AIML", "BSH", "Polytechnic", "Pharmacy",
+    ],
+    "Administrative": ["Administration", "Placements", "CAI"],
+    "Hostels": ["Boys Hostel", "Girls Hostel"],
+    "Sports & Recreation": ["Basketball Court", "Sports Area", "Canteen"],
+    "Other": ["Gate", "Bus Area"],
+}
+
+
+PATHS = {
+    ("Gate", "Placements"): {"distance": 50, "covered": True},
+    ("Gate", "Basketball Court"): {"distance": 30, "covered": False},
+    ("CSE1", "CSE2"): {"distance": 20, "covered": True},
+    ("CSE1", "EEE"): {"distance": 25, "covered": True},
+    ("CSE1", "ECE1"): {"distance": 35, "covered": True},
+    ("ECE1", "ECE2"): {"distance": 40, "covered": True},
+    ("ECE2", "Administration"): {"distance": 30, "covered": True},
+    ("ECE2", "Polytechnic"): {"distance": 25, "covered": True},
+    ("EEE", "MECH"): {"distance": 20, "covered": True},
+    ("EEE", "AIML"): {"distance": 25, "covered": True},
+    ("MECH", "CIVIL"): {"distance": 30, "covered": True},
+    ("CIVIL", "AIML"): {"distance": 25, "covered": True},
+    ("AIML", "CAI"): {"distance": 40, "covered": True},
+    ("CAI", "Girls Hostel"): {"distance": 35, "covered": True},
+    ("CAI", "Bus Area"): {"distance": 45, "covered": False},
+    ("Polytechnic", "BSH"): {"distance": 20, "covered": True},
+    ("BSH", "Placements"): {"distance": 35, "covered": True},
+    ("Placements", "Basketball Court"): {"distance": 25, "covered": False},
+    ("Basketball Court", "Boys Hostel"): {"distance": 30, "covered": False},
+    ("Basketball Court", "Sports Area"): {"distance": 35, "covered": False},
+    ("Boys Hostel", "Sports Area"): {"distance": 25, "covered": False},
+    ("Boys Hostel", "Pharmacy"): {"distance": 20, "covered": True}
+}
+
+
+# Placeholder (x, y) positions in metres east/north of the Gate for every
+# building and path junction, laid out to agree with the ``location`` text of
+# BUILDINGS until positions taken from the campus map replace them.  The
+# straight-line gap between two linked places never exceeds the path's
+# distance.
+COORDINATES = {
+    "Gate": (0, 0),
+    "Placements": (-10, 18),
+    "Basketball Court": (-5, -5),
+    "Boys Hostel": (20, -15),
+    "Pharmacy": (28, -2),
+    "Sports Area": (12, -30),
+    "BSH": (-35, 35),
+    "Polytechnic": (-50, 45),
+    "ECE2": (-70, 55),
+    "Administration": (-65, 30),
+    "ECE1": (-80, 92),
+    "CSE1": (-105, 68),
+    "CSE2": (-112, 85),
+    "EEE": (-122, 52),
+    "MECH": (-140, 45),
+    "AIML": (-112, 32),
+    "CIVIL": (-132, 20),
+    "CAI": (-100, -5),
+    "Girls Hostel": (-85, -35),
+    "Bus Area": (-78, -40),
+    "Canteen": (-62, -38),
+}
+
+
+def building_layout(building, floors, rooms_per_floor, pitch=4, door=2, stairs=10):
+    """Floor plan of a typical block: one corridor per floor, rooms on both sides.
+
+    Corridor junctions ``"<building> F<floor> C<j>"`` are ``pitch`` metres
+    apart and each serves the two rooms facing each other across it, ``door``
+    metres away.  Stairwells at both ends of the corridor join the floors
+    (``stairs`` metres per flight, marked ``"stairs": True``) and the
+    entrance, the building's node on the campus graph, opens onto the ground
+    floor.  Rooms are named ``"<building>-<floor><number>"``, e.g.
+    ``"CSE1-104"``.
+    """
+    junctions = max(1, -(-rooms_per_floor // 2))
+    paths = {}
+    rooms = {}
+    for floor in range(floors):
+        corridor = [f"{building} F{floor} C{j}" for j in range(junctions)]
+        for a, b in zip(corridor, corridor[1:]):
+            paths[(a, b)] = {"distance": pitch, "covered": True}
+        for number in range(rooms_per_floor):
+            rooms[f"{building}-{floor}{number + 1:02d}"] = (corridor[number // 2], door)
+        if floor:
+            for end in sorted({0, junctions - 1}):
+                below = f"{building} F{floor - 1} C{end}"
+                paths[(below, corridor[end])] = {"distance": stairs, "covered": True, "stairs": True}
+    paths[(building, f"{building} F0 C0")] = {"distance": door, "covered": True}
+    return {"paths": paths, "rooms": rooms}
+
+
+# Indoor floor plans keyed by building; the building's own name is its
+# entrance.  These follow the standard block layout until surveyed plans
+# (in the same shape) replace them.
+INDOOR = {
+    name: building_layout(name, floors, rooms)
+    for name, floors, rooms in [
+        ("CSE1", 3, 12), ("CSE2", 3, 10), ("ECE1", 3, 10), ("ECE2", 3, 10),
+        ("EEE", 2, 10), ("MECH", 2, 8), ("CIVIL", 2, 8), ("AIML", 3, 8),
+        ("BSH", 2, 10), ("Polytechnic", 2, 8), ("Pharmacy", 2, 8),
+        ("Administration", 2, 6),
+    ]
+}
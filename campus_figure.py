@@ -0,0 +1,118 @@
+"""Plotly figures of the campus graph.
+
+The base figure (every path and building) is built once per campus and
+reused; a route is drawn on top of it as one small overlay trace.  Figures
+are plain dicts in Plotly's JSON schema, so the routing service can ship them
+without importing plotly.
+"""
+import json
+import threading
+
+from metrics import count, timed
+
+COVERED_LINE = {"color": "seagreen", "width": 3}
+UNCOVERED_LINE = {"color": "darkgrey", "width": 2, "dash": "dot"}
+CLOSED_LINE = {"color": "firebrick", "width": 2, "dash": "dash"}
+ROUTE_LINE = {"color": "royalblue", "width": 6}
+
+
+def _edge_trace(name, segments, line):
+    x, y = [], []
+    for (x0, y0), (x1, y1) in segments:
+        x += [x0, x1, None]
+        y += [y0, y1, None]
+    return {
+        "type": "scatter", "mode": "lines", "name": name,
+        "x": x, "y": y, "line": line, "hoverinfo": "skip",
+    }
+
+
+@timed("build_base_figure")
+def build_base_figure(navigator):
+    coordinates = navigator.coordinates
+    covered, uncovered, closed = [], [], []
+    for (start, end), attrs in navigator.paths.items():
+        if start in coordinates and end in coordinates:
+            segment = (coordinates[start], coordinates[end])
+            if attrs.get("closed"):
+                closed.append(segment)
+            else:
+                (covered if attrs["covered"] else uncovered).append(segment)
+    places = [name for name in navigator.buildings if name in coordinates]
+    return {
+        "data": [
+            _edge_trace("Covered path", covered, COVERED_LINE),
+            _edge_trace("Open path", uncovered, UNCOVERED_LINE),
+            _edge_trace("Closed path", closed, CLOSED_LINE),
+            {
+                "type": "scatter", "mode": "markers+text", "name": "Buildings",
+                "x": [coordinates[name][0] for name in places],
+                "y": [coordinates[name][1] for name in places],
+                "text": places, "textposition": "top center",
+                "marker": {"size": 9, "color": "slategray"},
+                "hoverinfo": "text",
+            },
+        ],
+        "layout": {
+            "title": {"text": "Your Route Visualization"},
+            "showlegend": True,
+            "legend": {"orientation": "h"},
+            "plot_bgcolor": "white",
+            "height": 500,
+            "margin": {"l": 20, "r": 20, "t": 40, "b": 20},
+            "xaxis": {"visible": False},
+            "yaxis": {"visible": False, "scaleanchor": "x", "scaleratio": 1},
+        },
+    }
+
+
+_base_figures = {}
+_base_figures_lock = threading.Lock()
+
+
+def _cached_base(navigator):
+    cached = _base_figures.get(navigator.fingerprint)
+    if cached is None:
+        count("cache_misses", cache="base_figure")
+        with _base_figures_lock:
+            cached = _base_figures.get(navigator.fingerprint)
+            if cached is None:
+                figure = build_base_figure(navigator)
+                _base_figures.clear()
+                cached = _base_figures[navigator.fingerprint] = (figure, json.dumps(figure))
+    else:
+        count("cache_hits", cache="base_figure")
+    return cached
+
+
+def base_figure(navigator):
+    """The whole campus as a figure dict, shared by every query.  Do not mutate."""
+    return _cached_base(navigator)[0]
+
+
+def base_figure_json(navigator):
+    """:func:`base_figure` serialized once, for clients that keep it around."""
+    return _cached_base(navigator)[1]
+
+
+def route_overlay(route, coordinates):
+    """A single trace drawing ``route`` (a list of places) over the base figure."""
+    stops = [place for place in route if place in coordinates]
+    return {
+        "type": "scatter", "mode": "lines+markers", "name": "Your route",
+        "x": [coordinates[place][0] for place in stops],
+        "y": [coordinates[place][1] for place in stops],
+        "text": stops, "hoverinfo": "text",
+        "line": ROUTE_LINE,
+        "marker": {"size": 14, "symbol": "star", "color": "gold"},
+    }
+
+
+@timed("route_figure")
+def route_figure(navigator, route):
+    """Base figure plus the overlay for ``route``; the base is not copied."""
+    base = base_figure(navigator)
+    return {
+        "data": base["data"] + [route_overlay(route, navigator.coordinates)],
+        "layout": base["layout"],
+    }
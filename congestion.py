@@ -0,0 +1,68 @@
+"""Time-of-day congestion multipliers for campus paths.
+
+The day is cut into ``SLOT_MINUTES``-minute slots.  ``congestion.json`` lists
+how many times longer a path takes to walk during some of them::
+
+    [{"path": ["CSE1", "ECE1"], "slots": ["09:50", "10:40"], "multiplier": 2.5}]
+
+Each time names the slot containing it.  A path listed more than once for a
+slot takes the largest multiplier; paths and slots not listed are 1.
+"""
+import datetime
+import json
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+CONGESTION_FILE = Path(__file__).resolve().parent / "congestion.json"
+SLOT_MINUTES = 10
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+# Slots are campus time of day, whatever time zone the server runs in.
+CAMPUS_TIMEZONE = ZoneInfo("Asia/Kolkata")
+
+
+def parse_time(text):
+    """Minutes after midnight of an ``"HH:MM"`` string."""
+    hours, minutes = text.split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"not a time of day: {text!r}")
+    return hours * 60 + minutes
+
+
+def slot_of(departure):
+    """Slot of a departure given as a ``datetime``/``time``, ``"HH:MM"`` or
+    minutes after midnight."""
+    if isinstance(departure, (datetime.datetime, datetime.time)):
+        minutes = departure.hour * 60 + departure.minute
+    elif isinstance(departure, str):
+        minutes = parse_time(departure)
+    else:
+        minutes = int(departure)
+    return minutes % (24 * 60) // SLOT_MINUTES
+
+
+def campus_now():
+    """Current campus time of day, to the minute."""
+    return datetime.datetime.now(CAMPUS_TIMEZONE).time().replace(second=0, microsecond=0)
+
+
+def slot_label(slot):
+    minutes = slot * SLOT_MINUTES
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def load_congestion(path=CONGESTION_FILE):
+    """``{slot: {(start, end): multiplier}}`` from ``path``; empty if it is missing."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    congestion = {}
+    for entry in json.loads(path.read_text()):
+        start, end = entry["path"]
+        multiplier = float(entry["multiplier"])
+        if multiplier <= 0:
+            raise ValueError(f"multiplier for {start} - {end} must be positive")
+        for time in entry["slots"]:
+            slot = congestion.setdefault(slot_of(time), {})
+            slot[(start, end)] = max(multiplier, slot.get((start, end), multiplier))
+    return congestion
@@ -0,0 +1,433 @@
+from array import array
+from bisect import bisect_right
+from heapq import heappop, heappush
+from itertools import count
+from math import hypot
+
+INF = float("inf")
+
+
+def _edge_cost(weight, start, end, attrs):
+    # A closed path costs INF under every weight, which every search skips.
+    if attrs.get("closed"):
+        return INF
+    if callable(weight):
+        return weight(start, end, attrs)
+    return attrs.get(weight, 1)
+
+
+class CSRGraph:
+    """Campus graph stored as integer-indexed compressed sparse row arrays.
+
+    The neighbours of node ``i`` are ``neighbors[offsets[i]:offsets[i + 1]]``;
+    ``distance``, ``covered``, ``uncovered`` (metres in the open), ``edge_ids``
+    and every array in ``weights`` are indexed by the same edge slot.  Nodes
+    and neighbours are kept in the order networkx would give them, so
+    searches break ties exactly like ``nx.dijkstra_path``.
+
+    Each undirected path also has an edge id: ``edge_index`` maps the
+    symmetric key :meth:`edge_key` to it, ``edge_ends`` holds its two nodes
+    at ``2 * id`` and ``2 * id + 1``, and ``edge_distance``, ``edge_covered``
+    and ``edge_closed`` hold its attributes.
+
+    When ``coordinates`` covers every node, ``x``/``y`` hold their positions
+    and :meth:`astar` is available.
+
+    Paths whose attributes include ``closed: True`` stay in the arrays but
+    cost ``INF`` in every per-slot array; :meth:`set_edge` closes, reopens or
+    re-covers a path in place.
+    """
+
+    def __init__(self, paths, weights, coordinates=None):
+        self.nodes = []
+        self.index = {}
+        adjacency = []
+        edges = {}
+        for (start, end), attrs in paths.items():
+            for node in (start, end):
+                if node not in self.index:
+                    self.index[node] = len(self.nodes)
+                    self.nodes.append(node)
+                    adjacency.append([])
+            u, v = self.index[start], self.index[end]
+            key = (min(u, v), max(u, v))
+            if key in edges:
+                edges[key][1].update(attrs)
+                continue
+            edges[key] = (len(edges), dict(attrs))
+            adjacency[u].append((v, key))
+            if u != v:
+                adjacency[v].append((u, key))
+
+        n = len(self.nodes)
+        self.edge_index = {}
+        self.edge_attrs = []
+        self.edge_ends = array("i")
+        self.edge_distance = array("d")
+        self.edge_covered = array("b")
+        self.edge_closed = bytearray(len(edges))
+        for (lo, hi), (edge_id, attrs) in edges.items():
+            self.edge_index[lo * n + hi] = edge_id
+            self.edge_attrs.append(attrs)
+            self.edge_ends.extend((lo, hi))
+            self.edge_distance.append(attrs["distance"])
+            self.edge_covered.append(bool(attrs["covered"]))
+            self.edge_closed[edge_id] = bool(attrs.get("closed"))
+
+        self.offsets = array("i", [0])
+        self.neighbors = array("i")
+        self.edge_ids = array("i")
+        self.distance = array("d")
+        self.covered = array("b")
+        self.uncovered = array("d")
+        compiled = {name: array("d") for name in weights}
+        for u, node_edges in enumerate(adjacency):
+            for v, key in node_edges:
+                edge_id, attrs = edges[key]
+                closed = attrs.get("closed")
+                self.neighbors.append(v)
+                self.edge_ids.append(edge_id)
+                self.distance.append(INF if closed else attrs["distance"])
+                self.covered.append(bool(attrs["covered"]))
+                self.uncovered.append(INF if closed else 0 if attrs["covered"] else attrs["distance"])
+                for name, weight in weights.items():
+                    compiled[name].append(_edge_cost(weight, self.nodes[u], self.nodes[v], attrs))
+            self.offsets.append(len(self.neighbors))
+        self.weight_functions = dict(weights)
+        self.weights = compiled
+
+        self.x = self.y = None
+        self.heuristic_scale = {}
+        if coordinates and all(node in coordinates for node in self.nodes):
+            self.x = array("d", (coordinates[node][0] for node in self.nodes))
+            self.y = array("d", (coordinates[node][1] for node in self.nodes))
+            for name, weight in compiled.items():
+                self.heuristic_scale[name] = self._heuristic_scale(weight)
+
+    def _heuristic_scale(self, weight):
+        # Largest k with weight[e] >= k * straight-line length for every edge.
+        # k times the straight-line distance to the target is then a
+        # consistent A* heuristic, whatever the weight measures.
+        x, y, offsets, neighbors = self.x, self.y, self.offsets, self.neighbors
+        scale = INF
+        for v in range(len(self.nodes)):
+            for e in range(offsets[v], offsets[v + 1]):
+                u = neighbors[e]
+                length = hypot(x[u] - x[v], y[u] - y[v])
+                if length > 0:
+                    scale = min(scale, weight[e] / length)
+        return 0.0 if scale == INF else scale
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def set_edge(self, edge, closed=None, covered=None):
+        """Close, reopen or (un)cover path ``edge`` in place.
+
+        ``None`` leaves that attribute as it is.  Returns ``{name: (old, new)}``
+        for every weight whose cost on the path changed.
+        """
+        attrs = self.edge_attrs[edge]
+        if closed is not None:
+            attrs["closed"] = bool(closed)
+            self.edge_closed[edge] = bool(closed)
+        if covered is not None:
+            attrs["covered"] = bool(covered)
+            self.edge_covered[edge] = bool(covered)
+        changes = {}
+        shut = attrs.get("closed")
+        for e in self.edge_slots(edge):
+            u, v = self._slot_source(e), self.neighbors[e]
+            self.distance[e] = INF if shut else attrs["distance"]
+            self.covered[e] = bool(attrs["covered"])
+            self.uncovered[e] = INF if shut else 0 if attrs["covered"] else attrs["distance"]
+            for name, weight in self.weight_functions.items():
+                old, new = self.weights[name][e], _edge_cost(weight, self.nodes[u], self.nodes[v], attrs)
+                if old == new:
+                    continue
+                self.weights[name][e] = new
+                changes[name] = (old, new)
+                # A cheaper edge may break the A* heuristic; a dearer one cannot.
+                length = hypot(self.x[u] - self.x[v], self.y[u] - self.y[v]) if self.x else 0
+                if new < old and length > 0:
+                    self.heuristic_scale[name] = min(self.heuristic_scale[name], new / length)
+        return changes
+
+    def edge_slots(self, edge):
+        """The adjacency slots holding path ``edge`` (two, or one for a loop)."""
+        ends = {self.edge_ends[2 * edge], self.edge_ends[2 * edge + 1]}
+        offsets, edge_ids = self.offsets, self.edge_ids
+        return [e for v in ends for e in range(offsets[v], offsets[v + 1]) if edge_ids[e] == edge]
+
+    def dijkstra(self, source, weight, target=-1):
+        """Single-source Dijkstra from node ``source`` over edge costs ``weight``.
+
+        Returns ``(dist, pred)`` arrays indexed by node; unreached nodes have
+        distance ``INF`` and predecessor -1.  The search stops early once
+        ``target`` is settled.
+        """
+        return self.multi_source_dijkstra((source,), weight, target)
+
+    def multi_source_dijkstra(self, sources, weight, target=-1):
+        """Dijkstra from the nearest of ``sources``, like :meth:`dijkstra`.
+
+        Following ``pred`` from any node leads to its nearest source.
+        """
+        n = len(self.nodes)
+        offsets, neighbors = self.offsets, self.neighbors
+        dist = array("d", [INF]) * n
+        seen = array("d", [INF]) * n
+        pred = array("i", [-1]) * n
+        done = bytearray(n)
+        c = count()
+        fringe = []
+        for source in sources:
+            seen[source] = 0.0
+            fringe.append((0.0, next(c), source))
+        while fringe:
+            d, _, v = heappop(fringe)
+            if done[v]:
+                continue
+            done[v] = 1
+            dist[v] = d
+            if v == target:
+                break
+            for e in range(offsets[v], offsets[v + 1]):
+                u = neighbors[e]
+                vu_dist = d + weight[e]
+                if done[u]:
+                    if vu_dist < dist[u]:
+                        raise ValueError("Contradictory paths found: negative weights?")
+                elif vu_dist < seen[u]:
+                    seen[u] = vu_dist
+                    pred[u] = v
+                    heappush(fringe, (vu_dist, next(c), u))
+        return dist, pred
+
+    def astar(self, source, target, weight, scale):
+        """A* search guided by ``scale`` times the straight-line distance.
+
+        Returns the node indices of the cheapest route, or ``None`` if the
+        target is unreachable.
+        """
+        if self.x is None:
+            raise ValueError("A* needs coordinates for every node")
+        n = len(self.nodes)
+        x, y, offsets, neighbors = self.x, self.y, self.offsets, self.neighbors
+        tx, ty = x[target], y[target]
+        cost = array("d", [INF]) * n
+        pred = array("i", [-1]) * n
+        done = bytearray(n)
+        c = count()
+        cost[source] = 0.0
+        fringe = [(scale * hypot(x[source] - tx, y[source] - ty), next(c), 0.0, source)]
+        while fringe:
+            _, _, d, v = heappop(fringe)
+            if done[v] or d > cost[v]:
+                continue
+            if v == target:
+                break
+            done[v] = 1
+            for e in range(offsets[v], offsets[v + 1]):
+                u = neighbors[e]
+                vu_cost = d + weight[e]
+                if vu_cost < cost[u]:
+                    cost[u] = vu_cost
+                    pred[u] = v
+                    estimate = vu_cost + scale * hypot(x[u] - tx, y[u] - ty)
+                    heappush(fringe, (estimate, next(c), vu_cost, u))
+        else:
+            return None
+        return self.walk(pred, source, target)
+
+    def pareto(self, source, target, first, second):
+        """Pareto-optimal routes under two edge costs, ``first`` and ``second``.
+
+        Bi-objective label setting: labels are settled in lexicographic
+        ``(first, second)`` order, so a label is dominated exactly when its
+        node already holds a settled label with no larger ``second`` cost; one
+        number per node is enough for the dominance check.  Lower bounds from
+        two searches out of ``target`` guide the queue and drop labels that
+        cannot beat a route already found.  Returns ``(cost1, cost2, route)``
+        tuples ordered by increasing ``cost1`` (and so decreasing ``cost2``).
+        """
+        n = len(self.nodes)
+        offsets, neighbors = self.offsets, self.neighbors
+        bound1, _ = self.dijkstra(target, first)
+        bound2, _ = self.dijkstra(target, second)
+        if bound1[source] == INF:
+            return []
+        best2 = array("d", [INF]) * n
+        label_node = []
+        label_pred = []
+        c = count()
+        fringe = [(bound1[source], bound2[source], next(c), 0.0, 0.0, source, -1)]
+        front = []
+        while fringe:
+            _, _, _, d1, d2, v, pred = heappop(fringe)
+            if d2 >= best2[v] or d2 + bound2[v] >= best2[target]:
+                continue
+            best2[v] = d2
+            label = len(label_node)
+            label_node.append(v)
+            label_pred.append(pred)
+            if v == target:
+                route = []
+                while label != -1:
+                    route.append(label_node[label])
+                    label = label_pred[label]
+                route.reverse()
+                front.append((d1, d2, route))
+                continue
+            for e in range(offsets[v], offsets[v + 1]):
+                u = neighbors[e]
+                u1, u2 = d1 + first[e], d2 + second[e]
+                if u2 < best2[u] and u2 + bound2[u] < best2[target]:
+                    heappush(fringe, (u1 + bound1[u], u2 + bound2[u], next(c), u1, u2, u, label))
+        return front
+
+    def k_shortest(self, source, target, weight, k):
+        """Up to ``k`` cheapest loopless routes, as ``(cost, route)`` tuples.
+
+        Yen's algorithm with two ways of sharing work between the k searches:
+        each candidate only spurs from where it left its parent (Lawler), and
+        every spur search is an A* guided by the exact cost to ``target`` on
+        the full graph, taken from one search out of ``target``.
+        """
+        to_target, _ = self.dijkstra(target, weight)
+        if to_target[source] == INF:
+            return []
+        n = len(self.nodes)
+        first = self._spur(source, target, weight, to_target, bytearray(n), set())
+        # Accepted paths are (cost, nodes, slots, prefix costs, deviation index).
+        accepted = [self._with_prefix_costs(first, weight, 0)]
+        candidates = []
+        seen = {tuple(first[0])}
+        c = count()
+        while len(accepted) < k:
+            _, nodes, slots, prefix, deviation = accepted[-1]
+            for i in range(deviation, len(nodes) - 1):
+                root = nodes[:i + 1]
+                blocked_edges = {
+                    self.edge_ids[other[2][i]] for other in accepted
+                    if len(other[1]) > i + 1 and other[1][:i + 1] == root
+                }
+                blocked_nodes = bytearray(n)
+                for node in root[:-1]:
+                    blocked_nodes[node] = 1
+                spur = self._spur(nodes[i], target, weight, to_target, blocked_nodes, blocked_edges)
+                if spur is None:
+                    continue
+                spur_nodes, spur_slots = spur
+                path = root[:-1] + spur_nodes
+                if tuple(path) in seen:
+                    continue
+                seen.add(tuple(path))
+                cost = prefix[i] + sum(weight[e] for e in spur_slots)
+                heappush(candidates, (cost, next(c), path, slots[:i] + spur_slots, i))
+            if not candidates:
+                break
+            _, _, path, path_slots, deviation = heappop(candidates)
+            accepted.append(self._with_prefix_costs((path, path_slots), weight, deviation))
+        return [(path[0], path[1]) for path in accepted]
+
+    @staticmethod
+    def _with_prefix_costs(path, weight, deviation):
+        nodes, slots = path
+        prefix = [0.0]
+        for e in slots:
+            prefix.append(prefix[-1] + weight[e])
+        return (prefix[-1], nodes, slots, prefix, deviation)
+
+    def _spur(self, source, target, weight, to_target, blocked_nodes, blocked_edges):
+        # A* from source avoiding blocked nodes and edges; to_target is exact
+        # on the full graph, so it is a consistent heuristic on any subgraph.
+        # Returns (nodes, edge slots) or None.
+        n = len(self.nodes)
+        offsets, neighbors, edge_ids = self.offsets, self.neighbors, self.edge_ids
+        cost = array("d", [INF]) * n
+        pred_slot = array("i", [-1]) * n
+        c = count()
+        cost[source] = 0.0
+        fringe = [(to_target[source], next(c), 0.0, source)]
+        while fringe:
+            _, _, d, v = heappop(fringe)
+            if d > cost[v]:
+                continue
+            if v == target:
+                break
+            for e in range(offsets[v], offsets[v + 1]):
+                u = neighbors[e]
+                if blocked_nodes[u] or (blocked_edges and edge_ids[e] in blocked_edges):
+                    continue
+                vu_cost = d + weight[e]
+                if vu_cost < cost[u]:
+                    cost[u] = vu_cost
+                    pred_slot[u] = e
+                    heappush(fringe, (vu_cost + to_target[u], next(c), vu_cost, u))
+        else:
+            return None
+        nodes, slots = [target], []
+        v = target
+        while v != source:
+            e = pred_slot[v]
+            slots.append(e)
+            v = self._slot_source(e)
+            nodes.append(v)
+        nodes.reverse()
+        slots.reverse()
+        return nodes, slots
+
+    def _slot_source(self, e):
+        # Node whose adjacency range holds slot e.
+        return bisect_right(self.offsets, e) - 1
+
+    def shortest_path(self, source, target, weight):
+        """Node indices of the cheapest route, or ``None`` if unreachable."""
+        dist, pred = self.dijkstra(source, weight, target)
+        if dist[target] == INF:
+            return None
+        return self.walk(pred, source, target)
+
+    def components(self):
+        """Connected-component label of every node (labels count up from 0).
+
+        Closed paths do not connect anything.
+        """
+        n = len(self.nodes)
+        offsets, neighbors = self.offsets, self.neighbors
+        edge_ids, closed = self.edge_ids, self.edge_closed
+        labels = array("i", [-1]) * n
+        label = 0
+        for root in range(n):
+            if labels[root] != -1:
+                continue
+            labels[root] = label
+            stack = [root]
+            while stack:
+                v = stack.pop()
+                for e in range(offsets[v], offsets[v + 1]):
+                    u = neighbors[e]
+                    if labels[u] == -1 and not closed[edge_ids[e]]:
+                        labels[u] = label
+                        stack.append(u)
+            label += 1
+        return labels
+
+    def edge_key(self, u, v):
+        """Key of the undirected edge between ``u`` and ``v``, in either order."""
+        return u * len(self.nodes) + v if u < v else v * len(self.nodes) + u
+
+    def edge(self, u, v):
+        """Edge id of the path between ``u`` and ``v``, or -1 if there is none."""
+        return self.edge_index.get(self.edge_key(u, v), -1)
+
+    @staticmethod
+    def walk(pred, source, target):
+        """Follow ``pred`` back from ``target`` to ``source``; returns the route."""
+        route = [target]
+        while target != source:
+            target = pred[target]
+            route.append(target)
+        route.reverse()
+        return route
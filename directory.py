@@ -0,0 +1,201 @@
+"""Typo-tolerant search over the campus directory.
+
+The directory lists every building and every room of the floor plans.  Each
+distinct word of an entry's name, type, location and facilities is indexed
+twice: in a sorted vocabulary for prefix lookups and by trigram for
+misspellings.  A query matches its few words against the vocabulary, exactly,
+as a prefix or within a typo or two, and intersects the entries behind them,
+so it never scans the entries themselves.  Card HTML is rendered once per
+entry and reused on every rerun.
+"""
+import html
+import re
+import threading
+from bisect import bisect_left
+from collections import namedtuple
+
+from campus_data import BUILDING_TYPES, BUILDINGS, INDOOR
+
+# ``kind`` is the building's group in BUILDING_TYPES, or "Room".
+Entry = namedtuple("Entry", ["name", "kind", "location", "facilities", "building"])
+
+# Match scores of a query word against an indexed word, and how much more a
+# word of the entry's name counts than one of its other fields.
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.8
+TYPO_SCORES = {1: 0.6, 2: 0.4}
+NAME_WEIGHT = 2
+
+# Query words whose matches are kept; typing a query repeats its first words.
+MATCH_CACHE_SIZE = 4096
+
+CARD = """
+    <div class="building-card" style='height: 100%;'>
+        <h4>{name}</h4>
+        <p>📍 {location}</p>{facilities}
+    </div>
+"""
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def words(text):
+    return _WORD.findall(text.lower())
+
+
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def typo_limit(word):
+    """Typos tolerated in a query word: none up to 3 letters, then 1, then 2 from 8.
+
+    Words with digits name a particular block or room ("cse1", "104"), where
+    one character off is a different place, so they must match exactly.
+    """
+    if len(word) <= 3 or any(c.isdigit() for c in word):
+        return 0
+    return 1 if len(word) < 8 else 2
+
+
+def edit_distance(a, b, limit):
+    """Edit distance between ``a`` and ``b`` counting a swap of neighbouring
+    letters as one edit, or ``limit + 1`` once it is certainly above ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, y in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y))
+            if i > 1 and j > 1 and x == b[j - 2] and a[i - 2] == y:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def directory_entries(buildings=BUILDINGS, building_types=BUILDING_TYPES, indoor=INDOOR):
+    """Buildings in directory order, then every room of the floor plans."""
+    kinds = {name: kind for kind, names in building_types.items() for name in names if name in buildings}
+    order = list(kinds) + [name for name in buildings if name not in kinds]
+    entries = [
+        Entry(name, kinds.get(name, "Other"), buildings[name]["location"],
+              tuple(buildings[name]["facilities"]), name)
+        for name in order
+    ]
+    for building, layout in indoor.items():
+        for room in layout["rooms"]:
+            # Rooms are named "<building>-<floor><nn>" (see building_layout).
+            floor = room[len(building) + 1:-2]
+            entries.append(Entry(room, "Room", f"Floor {floor}, {building}", (), building))
+    return entries
+
+
+class Directory:
+    """Search index and card cache over directory :data:`Entry` objects."""
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self.by_name = {entry.name: entry for entry in self.entries}
+        postings = {}
+        for i, entry in enumerate(self.entries):
+            fields = ((entry.name, NAME_WEIGHT), (entry.kind, 1), (entry.location, 1),
+                      (" ".join(entry.facilities), 1))
+            for text, weight in fields:
+                for word in words(text):
+                    hits = postings.setdefault(word, {})
+                    hits[i] = max(hits.get(i, 0), weight)
+        # Word id -> {entry id: weight}, ids following the sorted vocabulary.
+        self.vocabulary = sorted(postings)
+        self.postings = [postings[word] for word in self.vocabulary]
+        self.grams = {}
+        for word_id, word in enumerate(self.vocabulary):
+            for gram in trigrams(word):
+                self.grams.setdefault(gram, []).append(word_id)
+        self._cards = {}
+        self._match_cache = {}
+
+    def _matches(self, word):
+        # Vocabulary ids matching ``word``, with their match score.
+        found = self._match_cache.get(word)
+        if found is None:
+            if len(self._match_cache) >= MATCH_CACHE_SIZE:
+                self._match_cache.clear()
+            found = self._match_cache[word] = self._find_matches(word)
+        return found
+
+    def _find_matches(self, word):
+        vocabulary = self.vocabulary
+        found = {}
+        i = bisect_left(vocabulary, word)
+        while i < len(vocabulary) and vocabulary[i].startswith(word):
+            found[i] = EXACT_SCORE if vocabulary[i] == word else PREFIX_SCORE
+            i += 1
+        limit = typo_limit(word)
+        if not limit:
+            return found
+        grams = trigrams(word)
+        shared = {}
+        for gram in grams:
+            for word_id in self.grams.get(gram, ()):
+                shared[word_id] = shared.get(word_id, 0) + 1
+        # One edit changes at most four trigrams (a swap of two letters).
+        needed = len(grams) - 4 * limit
+        for word_id, count in shared.items():
+            if count >= needed and word_id not in found:
+                distance = edit_distance(word, vocabulary[word_id], limit)
+                if distance <= limit:
+                    found[word_id] = TYPO_SCORES[distance]
+        return found
+
+    def search(self, query, limit=None):
+        """Entries matching every word of ``query``, best first.
+
+        Buildings come before rooms that score the same.  An empty query
+        matches nothing.
+        """
+        scores = None
+        for word in dict.fromkeys(words(query)):
+            word_scores = {}
+            for word_id, match in self._matches(word).items():
+                for i, weight in self.postings[word_id].items():
+                    if match * weight > word_scores.get(i, 0):
+                        word_scores[i] = match * weight
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {i: score + word_scores[i] for i, score in scores.items() if i in word_scores}
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        entries = self.entries
+        ranked = sorted(scores, key=lambda i: (-scores[i], entries[i].kind == "Room", i))
+        return [entries[i] for i in ranked[:limit]]
+
+    def card_html(self, entry):
+        """The directory card for ``entry``, rendered once."""
+        card = self._cards.get(entry.name)
+        if card is None:
+            facilities = f"\n        <p>🏢 {html.escape(', '.join(entry.facilities))}</p>" if entry.facilities else ""
+            card = self._cards[entry.name] = CARD.format(
+                name=html.escape(entry.name), location=html.escape(entry.location), facilities=facilities,
+            )
+        return card
+
+
+_directory = None
+_directory_lock = threading.Lock()
+
+
+def get_directory():
+    """:class:`Directory` over the campus data, built once per process."""
+    global _directory
+    if _directory is None:
+        with _directory_lock:
+            if _directory is None:
+                _directory = Directory(directory_entries())
+    return _directory
@@ -0,0 +1,278 @@
+"""Load-test the Streamlit app headlessly.
+
+Drives ``app.py`` through Streamlit's AppTest in many simulated sessions, each
+with its own session state, from several threads.  Every session clicks
+through the navigation view, the building directory and its search, the
+campus map and the sidebar quick links at random, and the script prints
+per-rerun latency percentiles, reruns per second and memory per session as
+JSON::
+
+    python load_test_app.py --sessions 50 --threads 8 --steps 20
+
+AppTest is not thread-safe, so reruns still run one at a time: the threads
+only interleave sessions, and the latencies include the wait for the turn.
+
+``--metrics`` also records the spans of :mod:`metrics` (every ``show_*``
+render function, route searches and figure building) and adds them to the
+report.
+
+The sidebar quick links open the modules of the ``pages`` package, which is
+deployed separately from this repository.  Any of them that cannot be
+imported is replaced by a placeholder page and listed under
+``stubbed_pages`` in the report, so the rest of the app can still be
+measured.
+"""
+import argparse
+import importlib
+import json
+import random
+import sys
+import threading
+import time
+import types
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # not on Windows
+    resource = None
+
+from streamlit.testing.v1 import AppTest
+
+import metrics
+from campus_data import BUILDINGS
+from metrics import percentile
+
+APP = Path(__file__).resolve().parent / "app.py"
+VIEWS = {"map": "📍 Campus Map", "navigation": "🚶‍♂️ Navigation", "buildings": "🏢 Building Info"}
+QUICK_LINKS = {
+    "Student": ["🎓 Find My Class", "🍽️ Canteen Menu"],
+    "Faculty": ["🏢 Faculty Room", "🎓 Department Office"],
+    "Visitor": ["🏛️ Administration", "🅿️ Parking Area"],
+}
+# Modules of the pages package imported by app.py, each exposing a function
+# of the same name.
+PAGES = ("class_finder", "canteen_menu", "faculty_room", "department_office", "administration", "parking_info")
+# Typed into the directory search, typos included; "" clears it.
+SEARCHES = ("labs", "girls hostle", "cse1 1", "admin", "")
+
+# AppTest is not thread-safe (concurrent runs share parser and runtime state),
+# so one rerun executes at a time.  A real server runs the script under the
+# GIL too, so this mostly moves the queueing from the GIL to this lock.
+_run_lock = threading.Lock()
+
+
+class Session:
+    """One simulated visitor: an AppTest with its own session state."""
+
+    def __init__(self, rng, timeout):
+        self.rng = rng
+        self.app = AppTest.from_file(str(APP), default_timeout=timeout)
+        self.latencies = []  # from asking for a rerun to its end, waiting included
+        self.service = []    # running the script alone
+        self.errors = []
+
+    def rerun(self):
+        queued = time.perf_counter()
+        with _run_lock:
+            began = time.perf_counter()
+            self.app.run()
+            finished = time.perf_counter()
+        self.latencies.append(finished - queued)
+        self.service.append(finished - began)
+        if self.app.exception:
+            self.errors.append(self.app.exception[0].value)
+
+    def click(self, label, sidebar=False):
+        buttons = self.app.sidebar.button if sidebar else self.app.button
+        for button in buttons:
+            if button.label == label:
+                button.click()
+                return self.rerun()
+        self.errors.append(f"no button {label!r}")
+
+    def show(self, view):
+        self.app.radio(key="view").set_value(VIEWS[view])
+        self.rerun()
+
+    def navigate(self):
+        self.show("navigation")
+        start, end = self.rng.sample(list(BUILDINGS), 2)
+        self.app.selectbox[0].set_value(start)
+        self.rerun()
+        self.app.selectbox[1].set_value(end)
+        self.rerun()
+        self.click("Find My Way!")
+
+    def browse_buildings(self):
+        self.show("buildings")
+        self.app.text_input(key="directory_search").set_value(self.rng.choice(SEARCHES))
+        self.rerun()
+
+    def browse_map(self):
+        self.show("map")
+
+    def quick_link(self):
+        user_type = self.rng.choice(list(QUICK_LINKS))
+        self.app.sidebar.radio[0].set_value(user_type)
+        self.rerun()
+        self.click(self.rng.choice(QUICK_LINKS[user_type]), sidebar=True)
+        self.click("🏠 Back to Home", sidebar=True)
+
+    def step(self):
+        action = self.rng.choice((self.navigate, self.browse_buildings, self.browse_map, self.quick_link))
+        try:
+            action()
+        except Exception as e:
+            # The page did not look as expected (e.g. after a failed rerun);
+            # record it and carry on with the next step.
+            self.errors.append(f"{action.__name__}: {type(e).__name__}: {e}")
+
+    def state_bytes(self):
+        return deep_size(self.app.session_state.to_dict())
+
+
+def _placeholder_page(name):
+    def page():
+        import streamlit as st
+        st.info(f"The {name} page is not deployed here.")
+    return page
+
+
+def stub_missing_pages():
+    """Install a placeholder for every page module that cannot be imported.
+
+    Returns the names of the pages replaced.
+    """
+    stubbed = []
+    for name in PAGES:
+        module_name = f"pages.{name}"
+        try:
+            importlib.import_module(module_name)
+        except ModuleNotFoundError as e:
+            if e.name not in ("pages", module_name):
+                raise
+            if "pages" not in sys.modules:
+                sys.modules["pages"] = types.ModuleType("pages")
+            module = types.ModuleType(module_name)
+            setattr(module, name, _placeholder_page(name))
+            setattr(sys.modules["pages"], name, module)
+            sys.modules[module_name] = module
+            stubbed.append(name)
+    return stubbed
+
+
+def deep_size(obj, seen=None):
+    """Rough bytes held by ``obj`` and everything it contains."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    return size
+
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux and bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20
+
+
+def worker(sessions, steps):
+    for session in sessions:
+        session.rerun()
+    for _ in range(steps):
+        for session in sessions:
+            session.step()
+
+
+def run(sessions, threads, steps, seed, timeout=30):
+    stubbed = stub_missing_pages()
+    # One throwaway run first, so the shared navigator, figures and imports
+    # are not counted against the sessions.
+    Session(random.Random(seed), timeout).rerun()
+    metrics.reset()
+    rss_before = max_rss_mb()
+    simulated = [Session(random.Random(seed + i), timeout) for i in range(sessions)]
+    workers = [
+        threading.Thread(target=worker, args=(simulated[i::threads], steps))
+        for i in range(threads)
+    ]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    rss_after = max_rss_mb()
+
+    first_runs = sorted(session.latencies[0] for session in simulated if session.latencies)
+    latencies = sorted(t for session in simulated for t in session.latencies[1:])
+    service = sorted(t for session in simulated for t in session.service[1:])
+    state_sizes = [session.state_bytes() for session in simulated]
+    errors = [str(error) for session in simulated for error in session.errors]
+    report = {
+        "sessions": sessions,
+        "threads": threads,
+        "stubbed_pages": stubbed,
+        "duration_s": elapsed,
+        "reruns": len(latencies) + len(first_runs),
+        "errors": len(errors),
+        "first_errors": sorted(set(errors))[:5],
+        "reruns_per_s": (len(latencies) + len(first_runs)) / elapsed,
+        "first_run_s": {
+            "p50": percentile(first_runs, 0.50),
+            "max": first_runs[-1] if first_runs else None,
+        },
+        "rerun_latency_s": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else None,
+        },
+        "rerun_service_s": {
+            "p50": percentile(service, 0.50),
+            "p95": percentile(service, 0.95),
+            "mean": sum(service) / len(service) if service else None,
+        },
+        "session_state_bytes": {
+            "mean": sum(state_sizes) / len(state_sizes) if state_sizes else None,
+            "max": max(state_sizes, default=None),
+        },
+        "max_rss_mb": rss_after,
+        "rss_growth_mb_per_session": (
+            (rss_after - rss_before) / sessions if rss_after is not None and sessions else None
+        ),
+    }
+    if metrics.enabled():
+        report["spans"] = metrics.snapshot()["spans"]
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the Streamlit campus app headlessly")
+    parser.add_argument("--sessions", type=int, default=20, help="simulated sessions")
+    parser.add_argument("--threads", type=int, default=4,
+                        help="threads driving the sessions; reruns still run one at a time")
+    parser.add_argument("--steps", type=int, default=10, help="actions per session")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds allowed per rerun")
+    parser.add_argument("--metrics", action="store_true", help="add metrics spans to the report")
+    args = parser.parse_args(argv)
+
+    if args.metrics:
+        metrics.enable()
+    report = run(args.sessions, max(1, min(args.threads, args.sessions)), args.steps, args.seed, args.timeout)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Load-test the JSON routing service.
+
+Fires random ``/route`` queries from several keep-alive connections and prints
+throughput and latency percentiles as JSON::
+
+    python load_test_service.py --spawn --concurrency 16 --duration 10
+    python load_test_service.py --url http://127.0.0.1:8502
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+from metrics import percentile
+from route_service import make_server
+
+
+def worker(host, port, names, preferences, deadline, seed, latencies, errors):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection(host, port)
+    while time.perf_counter() < deadline:
+        start, end = rng.sample(names, 2)
+        preference = rng.choice(preferences)
+        target = f"/route?start={quote(start)}&end={quote(end)}&preference={quote(preference)}"
+        began = time.perf_counter()
+        try:
+            conn.request("GET", target)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors.append("connection")
+            conn.close()
+            conn = http.client.HTTPConnection(host, port)
+            continue
+        latencies.append(time.perf_counter() - began)
+        # 404 is a valid answer for unconnected places; anything else is not.
+        if response.status not in (200, 404):
+            errors.append(response.status)
+    conn.close()
+
+
+def run(host, port, concurrency, duration, seed):
+    conn = http.client.HTTPConnection(host, port)
+    conn.request("GET", "/buildings")
+    names = list(json.loads(conn.getresponse().read()))
+    conn.request("GET", "/preferences")
+    preferences = list(json.loads(conn.getresponse().read()))
+    conn.close()
+
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=worker, args=(host, port, names, preferences, deadline, seed + i, latencies, errors))
+        for i in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "duration_s": elapsed,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_s": len(latencies) / elapsed,
+        "latency_s": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else None,
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the campus routing service")
+    parser.add_argument("--url", default="http://127.0.0.1:8502")
+    parser.add_argument("--spawn", action="store_true",
+                        help="start a local service on a free port for the run")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.spawn:
+        server = make_server(port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+    else:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    try:
+        report = run(host, port, args.concurrency, args.duration, args.seed)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
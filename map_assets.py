@@ -0,0 +1,103 @@
+"""Campus map image pipeline.
+
+The map is decoded once per process, then pre-scaled to a few widths and cut
+into tiles, all encoded up front so a rerun only ships ready-made bytes of
+the size the client needs.
+"""
+import io
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+from metrics import count
+
+MAP_IMAGE = Path(__file__).resolve().parent / "image.png"
+VARIANT_WIDTHS = (480, 960, 1600)
+TILE_SIZE = 512
+JPEG_QUALITY = 85
+
+MapImage = namedtuple("MapImage", ["width", "height", "data", "mime"])
+
+
+def _encode(image):
+    # Opaque maps compress far better as JPEG; keep PNG when there is alpha.
+    buffer = io.BytesIO()
+    if image.mode == "RGBA":
+        image.save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue(), "image/png"
+    image.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    return buffer.getvalue(), "image/jpeg"
+
+
+class MapAsset:
+    """Pre-encoded variants and tiles of one decoded map image.
+
+    ``variants`` is sorted by width and always ends with the full-size image;
+    ``tiles`` maps ``(col, row)`` to ``TILE_SIZE`` squares of the full image.
+    """
+
+    def __init__(self, image):
+        from PIL import Image
+
+        transparent = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if transparent else "RGB")
+        self.width, self.height = image.size
+        self.variants = []
+        for width in VARIANT_WIDTHS:
+            if width < self.width:
+                height = round(self.height * width / self.width)
+                scaled = image.resize((width, height), Image.LANCZOS)
+                self.variants.append(MapImage(width, height, *_encode(scaled)))
+        self.variants.append(MapImage(self.width, self.height, *_encode(image)))
+
+        self.columns = -(-self.width // TILE_SIZE)
+        self.rows = -(-self.height // TILE_SIZE)
+        self.tiles = {}
+        for row in range(self.rows):
+            for col in range(self.columns):
+                box = (col * TILE_SIZE, row * TILE_SIZE,
+                       min((col + 1) * TILE_SIZE, self.width),
+                       min((row + 1) * TILE_SIZE, self.height))
+                tile = image.crop(box)
+                self.tiles[(col, row)] = MapImage(tile.width, tile.height, *_encode(tile))
+
+    def for_width(self, width):
+        """Smallest variant at least ``width`` pixels wide (or the largest)."""
+        for variant in self.variants:
+            if variant.width >= width:
+                return variant
+        return self.variants[-1]
+
+    def tile(self, col, row):
+        return self.tiles.get((col, row))
+
+
+_assets = {}
+_assets_lock = threading.Lock()
+
+
+def load_map(path=MAP_IMAGE):
+    """:class:`MapAsset` for ``path``, built once per process.
+
+    The image is decoded again only if the file changes on disk.  Raises
+    ``OSError`` if it is missing or cannot be read as an image.
+    """
+    path = Path(path)
+    key = (str(path), path.stat().st_mtime_ns)
+    asset = _assets.get(key)
+    if asset is None:
+        count("cache_misses", cache="map")
+        with _assets_lock:
+            asset = _assets.get(key)
+            if asset is None:
+                from PIL import Image
+
+                with Image.open(path) as image:
+                    image.load()
+                    asset = MapAsset(image)
+                for stale in [k for k in _assets if k[0] == key[0]]:
+                    del _assets[stale]
+                _assets[key] = asset
+    else:
+        count("cache_hits", cache="map")
+    return asset
@@ -0,0 +1,172 @@
+"""Timing spans and counters for the navigator's hot paths.
+
+Off unless ``CAMPUS_METRICS=1`` is set or :func:`enable` is called.  While off,
+:func:`span` returns one shared no-op context manager and :func:`count` and
+timed functions only check a flag, so instrumented code pays next to nothing.
+
+Spans are inclusive: a span opened inside another is counted in both.
+:func:`prometheus_text` renders everything in the Prometheus text format and
+:func:`snapshot` as a JSON-ready dict.
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "campus"
+
+_enabled = os.environ.get("CAMPUS_METRICS", "") not in ("", "0")
+_lock = threading.Lock()
+_spans = {}      # name -> [count, total seconds, max seconds]
+_counters = {}   # (name, ((label, value), ...)) -> count
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+def observe(name, seconds):
+    """Record one ``seconds``-long run of span ``name``."""
+    if not _enabled:
+        return
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            _spans[name] = [1, seconds, seconds]
+        else:
+            stats[0] += 1
+            stats[1] += seconds
+            if seconds > stats[2]:
+                stats[2] = seconds
+
+
+def count(name, amount=1, **labels):
+    """Add ``amount`` to counter ``name``, e.g. ``count("cache_hits", cache="figure")``."""
+    if not _enabled:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+class _Span:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe(self.name, time.perf_counter() - self.started)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name):
+    """Context manager timing the block as span ``name``."""
+    return _Span(name) if _enabled else _NO_SPAN
+
+
+def timed(name=None):
+    """Decorator timing every call as span ``name`` (default: the function's name)."""
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(label, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+def _label_text(labels):
+    return ",".join(f'{key}="{value}"' for key, value in labels)
+
+
+def snapshot():
+    """Spans and counters so far, as plain dicts."""
+    with _lock:
+        return {
+            "spans": {
+                name: {"count": n, "total_s": total, "max_s": longest}
+                for name, (n, total, longest) in sorted(_spans.items())
+            },
+            "counters": {
+                f"{name}{{{_label_text(labels)}}}" if labels else name: value
+                for (name, labels), value in sorted(_counters.items())
+            },
+        }
+
+
+def prometheus_text():
+    """Everything recorded so far in the Prometheus text exposition format."""
+    with _lock:
+        spans = sorted(_spans.items())
+        counters = sorted(_counters.items())
+    lines = []
+    if spans:
+        metric = f"{PREFIX}_span_seconds"
+        lines.append(f"# TYPE {metric} summary")
+        for name, (n, total, _) in spans:
+            lines.append(f'{metric}_count{{span="{name}"}} {n}')
+            lines.append(f'{metric}_sum{{span="{name}"}} {total:.9f}')
+        lines.append(f"# TYPE {metric}_max gauge")
+        for name, (_, _, longest) in spans:
+            lines.append(f'{metric}_max{{span="{name}"}} {longest:.9f}')
+    typed = set()
+    for (name, labels), value in counters:
+        metric = f"{PREFIX}_{name}_total"
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{{{_label_text(labels)}}} {value}" if labels else f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def log_snapshot():
+    """Log :func:`snapshot` as one JSON line (only while enabled)."""
+    if _enabled:
+        logger.info("metrics %s", json.dumps(snapshot()))
+
+
+def percentile(sorted_values, fraction):
+    """Value at ``fraction`` of the way through ``sorted_values``, or ``None``."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
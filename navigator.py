@@ -0,0 +1,1042 @@
+import hashlib
+import logging
+import threading
+from array import array
+from collections import OrderedDict, namedtuple
+from functools import cached_property
+
+from campus_data import BUILDINGS, COORDINATES, INDOOR, PATHS
+from congestion import SLOTS_PER_DAY, load_congestion, slot_label, slot_of
+from csr_graph import CSRGraph
+from metrics import count, span, timed
+
+INF = float("inf")
+
+logger = logging.getLogger(__name__)
+
+
+def _networkx():
+    # networkx is only needed by the "networkx" backend and for NodeNotFound,
+    # so it is imported on first use to keep it (~0.1 s) off cold starts.
+    import networkx
+    return networkx
+
+
+class NoRoute(Exception):
+    """No route between two places."""
+
+
+def no_path(start, end):
+    count("no_path")
+    return NoRoute(f"No path between {start} and {end}.")
+
+
+def node_not_found(node):
+    return _networkx().NodeNotFound(f"Node {node} not in graph")
+
+
+# Walking speeds in metres per second, on the flat and up or down stairs.
+WALKING_SPEED = 1.3
+STAIRS_SPEED = 0.5
+
+
+def covered_weight(u, v, d):
+    return 1 if d["covered"] else 2
+
+
+def step_free_weight(u, v, d):
+    return INF if d.get("stairs") else d["distance"]
+
+
+def walking_time(u, v, d):
+    return d["distance"] / (STAIRS_SPEED if d.get("stairs") else WALKING_SPEED)
+
+
+# Registered route preferences ("cost profiles"), in the order they are
+# offered: name -> edge weight, either an edge attribute or a function
+# ``(u, v, attrs) -> cost``.  Every graph compiles each one into its own weight
+# array and route tables are built per preference on first use, so a query
+# only ever touches the arrays of the preference it asks for.
+PREFERENCE_WEIGHTS = {}
+PREFERENCE_LABELS = {}
+
+
+def register_preference(name, weight, label=None):
+    """Add a route preference.  Navigators built before this do not know it."""
+    PREFERENCE_WEIGHTS[name] = weight
+    PREFERENCE_LABELS[name] = label or name
+
+
+register_preference("Shortest", "distance", "Shortest Route")
+register_preference("Covered", covered_weight, "Covered Pathway")
+register_preference("Wheelchair", step_free_weight, "Step-free (no stairs)")
+register_preference("Fastest", walking_time, "Fastest")
+
+
+def preference_key(preference):
+    """``preference`` itself if it is registered; ``ValueError`` otherwise."""
+    if preference not in PREFERENCE_WEIGHTS:
+        raise ValueError(f"unknown route preference {preference!r}")
+    return preference
+
+
+def graph_fingerprint(buildings, paths, coordinates=None):
+    """Hash of the campus data; route tables are only reused while it matches."""
+    digest = hashlib.sha1()
+    digest.update(repr(list(buildings.items())).encode())
+    digest.update(repr(list(paths.items())).encode())
+    if coordinates:
+        digest.update(repr(list(coordinates.items())).encode())
+    return digest.hexdigest()
+
+
+def _tree_may_change(dist, pred, base, u, v, old, new):
+    """Whether edge ``u``-``v`` going from cost ``old`` to ``new`` can change a
+    search tree stored at ``dist[base:]``/``pred[base:]``.
+
+    A dearer edge only matters if the tree uses it; a cheaper one only if it
+    now reaches one end at no more than its current cost (ties included,
+    since they decide which route is kept).
+    """
+    if new > old:
+        return pred[base + v] == u or pred[base + u] == v
+    du, dv = dist[base + u], dist[base + v]
+    return (du != INF and du + new <= dv) or (dv != INF and dv + new <= du)
+
+
+def _lookup(index, node):
+    try:
+        return index[node]
+    except KeyError:
+        raise node_not_found(node) from None
+
+
+class RouteTable:
+    """All-pairs routes for one preference, stored as flat ``n * n`` arrays.
+
+    ``next_hop[s * n + v]`` is the neighbour of ``v`` one step closer to ``s``
+    on the shortest-path tree rooted at ``s`` (-1 for ``s`` itself and for
+    unreachable nodes), and ``dist[s * n + v]`` is the cost between them.
+    Walking a row from the destination back to ``s`` reproduces exactly the
+    route a single-source search from ``s`` would return.
+    """
+
+    def __init__(self, nodes, next_hop, dist):
+        self.nodes = nodes
+        self.index = {node: i for i, node in enumerate(nodes)}
+        self.next_hop = next_hop
+        self.dist = dist
+
+    @classmethod
+    @timed("build_route_table")
+    def build(cls, csr, weight):
+        """Table over ``csr`` for the per-slot edge costs ``weight``."""
+        n = len(csr)
+        next_hop = array("i")
+        dist = array("d")
+        for s in range(n):
+            # The predecessor array of a search from s is exactly row s.
+            row_dist, row_pred = csr.dijkstra(s, weight)
+            next_hop.extend(row_pred)
+            dist.extend(row_dist)
+        return cls(list(csr.nodes), next_hop, dist)
+
+    def repaired(self, csr, weight, u, v, old, new):
+        """Copy of the table after edge ``u``-``v`` changed cost from ``old`` to
+        ``new`` in ``weight``, and the number of rows searched again.
+
+        Only rows whose tree may change are recomputed; the copy lets walks
+        in progress keep reading the old table.
+        """
+        n = len(self.nodes)
+        next_hop, dist = array("i", self.next_hop), array("d", self.dist)
+        rows = 0
+        for s in range(n):
+            base = s * n
+            if _tree_may_change(dist, next_hop, base, u, v, old, new):
+                row_dist, row_pred = csr.dijkstra(s, weight)
+                next_hop[base:base + n] = row_pred
+                dist[base:base + n] = row_dist
+                rows += 1
+        return RouteTable(self.nodes, next_hop, dist), rows
+
+    def distance(self, start, end):
+        s, t = _lookup(self.index, start), _lookup(self.index, end)
+        return self.dist[s * len(self.nodes) + t]
+
+    def walk(self, s, t):
+        """Node indices of the route from ``s`` to ``t``, or ``None``."""
+        row = s * len(self.nodes)
+        if self.dist[row + t] == INF:
+            return None
+        route = [t]
+        while t != s:
+            t = self.next_hop[row + t]
+            route.append(t)
+        route.reverse()
+        return route
+
+    def path(self, start, end):
+        route = self.walk(_lookup(self.index, start), _lookup(self.index, end))
+        if route is None:
+            raise no_path(start, end)
+        nodes = self.nodes
+        return [nodes[i] for i in route]
+
+
+class FacilityIndex:
+    """Nearest holder of every facility from every place, per preference.
+
+    ``holders`` inverts ``BUILDINGS[*]["facilities"]``.  For each facility and
+    preference one multi-source search out of all its holders, run the first
+    time it is needed, fills a distance array and a predecessor array leading
+    to the nearest holder, so "nearest X from here" is a lookup plus a walk
+    along the route.  Facility names are matched case-insensitively.
+    """
+
+    def __init__(self, buildings, csr):
+        self.csr = csr
+        self.names = {}
+        self.holders = {}
+        for building, details in buildings.items():
+            for facility in details.get("facilities", ()):
+                name = self.names.setdefault(facility.casefold(), facility)
+                self.holders.setdefault(name, []).append(building)
+        self.sources = {
+            name: [csr.index[b] for b in holders if b in csr.index]
+            for name, holders in self.holders.items()
+        }
+        self.tables = {}
+
+    def table(self, facility, preference):
+        """``(dist, pred)`` towards the nearest ``facility``, or ``None`` if no
+        holder is on the graph."""
+        table = self.tables.get((facility, preference))
+        if table is None and self.sources[facility]:
+            weight = self.csr.weights[preference]
+            table = self.csr.multi_source_dijkstra(self.sources[facility], weight)
+            self.tables[(facility, preference)] = table
+        return table
+
+    def repair(self, u, v, changes):
+        """Redo the searches that edge ``u``-``v`` changing cost may affect.
+
+        ``changes`` maps preferences to ``(old, new)`` costs, as returned by
+        :meth:`CSRGraph.set_edge`.  Returns how many searches were redone.
+        """
+        redone = 0
+        for (name, preference), (dist, pred) in list(self.tables.items()):
+            if preference in changes and _tree_may_change(dist, pred, 0, u, v, *changes[preference]):
+                weight = self.csr.weights[preference]
+                self.tables[(name, preference)] = self.csr.multi_source_dijkstra(self.sources[name], weight)
+                redone += 1
+        return redone
+
+    def facility(self, name):
+        try:
+            return self.names[name.casefold()]
+        except KeyError:
+            raise ValueError(f"unknown facility {name!r}") from None
+
+    def nearest(self, start, facility, preference):
+        """Places from ``start`` to the nearest holder of ``facility``, or ``None``."""
+        facility = self.facility(facility)
+        if start in self.holders[facility]:
+            return [start]
+        csr = self.csr
+        table = self.table(facility, preference)
+        v = csr.index.get(start)
+        if table is None or v is None:
+            return None
+        dist, pred = table
+        if dist[v] == INF:
+            return None
+        route = [v]
+        while pred[v] != -1:
+            v = pred[v]
+            route.append(v)
+        return [csr.nodes[i] for i in route]
+
+
+class FloorPlan:
+    """Corridors, stairs and rooms inside one building.
+
+    ``layout`` has ``paths`` between corridor junctions, stairwells and the
+    entrance (named after the building: its node on the campus graph) and
+    ``rooms`` mapping each room to ``(door, distance)``, the junction it
+    opens onto.  Rooms are contracted away: they are leaves, so they never
+    lie on a route between two other places and only the junctions are
+    searched, however many rooms there are.
+
+    The entrance is the only way in, so one search per preference out of it
+    answers every room-to-entrance leg; routes between two places in the
+    building walk a route table over the junctions, built on first use.
+    """
+
+    def __init__(self, building, layout):
+        self.building = building
+        self.csr = CSRGraph(layout["paths"], PREFERENCE_WEIGHTS)
+        self.entrance = _lookup(self.csr.index, building)
+        self.rooms = {
+            room: (_lookup(self.csr.index, door), distance)
+            for room, (door, distance) in layout["rooms"].items()
+        }
+        self.from_entrance = {
+            preference: self.csr.dijkstra(self.entrance, weight)
+            for preference, weight in self.csr.weights.items()
+        }
+        self._tables = {}
+        self._tables_lock = threading.Lock()
+
+    def __contains__(self, place):
+        return place in self.rooms or place in self.csr.index
+
+    def _door(self, place):
+        return self.rooms[place][0] if place in self.rooms else self.csr.index[place]
+
+    def _places(self, start, route, end=None):
+        # Junction indices to names, with the rooms at either end added.
+        names = [self.csr.nodes[i] for i in route]
+        if start in self.rooms:
+            names.insert(0, start)
+        if end in self.rooms:
+            names.append(end)
+        return names
+
+    def to_entrance(self, place, preference):
+        """Places from ``place`` out to the entrance, or ``None`` if cut off."""
+        v = self._door(place)
+        dist, pred = self.from_entrance[preference]
+        if dist[v] == INF:
+            return None
+        route = [v]
+        while pred[v] != -1:
+            v = pred[v]
+            route.append(v)
+        return self._places(place, route)
+
+    def between(self, start, end, preference):
+        """Places from ``start`` to ``end`` inside the building, or ``None``."""
+        table = self._tables.get(preference)
+        if table is None:
+            with self._tables_lock:
+                table = self._tables.get(preference)
+                if table is None:
+                    table = self._tables[preference] = RouteTable.build(self.csr, self.csr.weights[preference])
+        route = table.walk(self._door(start), self._door(end))
+        if route is None:
+            return None
+        return self._places(start, route, end)
+
+    def step(self, a, b):
+        """``(distance, covered)`` of the step between two adjacent places."""
+        if a in self.rooms or b in self.rooms:
+            return (self.rooms[a] if a in self.rooms else self.rooms[b])[1], True
+        csr = self.csr
+        edge = csr.edge(csr.index[a], csr.index[b])
+        return csr.edge_distance[edge], bool(csr.edge_covered[edge])
+
+
+# Route tables are shared by every navigator (and so every Streamlit session)
+# in the process, keyed by (graph fingerprint, preference) or, for congested
+# time slots, (graph fingerprint, (preference, congestion profile)).
+_route_tables = {}
+_route_tables_lock = threading.Lock()
+
+
+def shared_route_table(fingerprint, preference, csr, weight=None):
+    key = (fingerprint, preference)
+    table = _route_tables.get(key)
+    if table is None:
+        count("cache_misses", cache="route_table")
+        with _route_tables_lock:
+            table = _route_tables.get(key)
+            if table is None:
+                for stale in [k for k in _route_tables if k[0] != fingerprint]:
+                    del _route_tables[stale]
+                table = RouteTable.build(csr, csr.weights[preference] if weight is None else weight)
+                _route_tables[key] = table
+    else:
+        count("cache_hits", cache="route_table")
+    return table
+
+
+def _replace_route_tables(old_fingerprint, fingerprint, tables):
+    # Re-key a navigator's tables after an edge update; other fingerprints
+    # are dropped, as in shared_route_table.
+    with _route_tables_lock:
+        for stale in [k for k in _route_tables if k[0] not in (old_fingerprint, fingerprint)]:
+            del _route_tables[stale]
+        for preference, table in tables.items():
+            _route_tables[(fingerprint, preference)] = table
+
+
+BACKENDS = ("table", "csr", "astar", "networkx")
+
+# Alternative-route answers kept per navigator, least recently used first out.
+ALTERNATIVES_CACHE_SIZE = 512
+
+# One edge of a route: the places it joins, the edge id in ``CSRGraph`` (-1
+# for steps inside a building), its length, whether it is covered and the
+# metres walked once it is done.
+Leg = namedtuple("Leg", ["start", "end", "edge", "distance", "covered", "cumulative"])
+
+
+class Route(list):
+    """The places along a route, annotated with its legs.
+
+    ``legs`` has one :data:`Leg` per edge walked; ``distance`` is the total
+    length in metres and ``covered`` how many of those metres are covered.
+    """
+
+    def __init__(self, path, legs=()):
+        super().__init__(path)
+        self.legs = list(legs)
+        self.distance = self.legs[-1].cumulative if self.legs else 0
+        self.covered = sum(leg.distance for leg in self.legs if leg.covered)
+
+    @classmethod
+    def join(cls, routes):
+        """One route walking ``routes`` in turn; each starts where the last ends."""
+        path, legs, walked = [], [], 0
+        for route in routes:
+            path.extend(route[1:] if path else route)
+            for leg in route.legs:
+                walked += leg.distance
+                legs.append(leg._replace(cumulative=walked))
+        return cls(path, legs)
+
+    @property
+    def start(self):
+        return self[0]
+
+    @property
+    def end(self):
+        return self[-1]
+
+    @property
+    def path(self):
+        return list(self)
+
+    def as_dict(self):
+        return {
+            "start": self.start,
+            "end": self.end,
+            "path": self.path,
+            "distance": self.distance,
+            "covered": self.covered,
+            "legs": [leg._asdict() for leg in self.legs],
+        }
+
+
+class CampusNavigator:
+    """Shortest-route search over the campus graph.
+
+    Backends:
+
+    - ``"table"``: walk the shared all-pairs route tables.
+    - ``"csr"``: run Dijkstra over the array-backed :class:`CSRGraph`.
+    - ``"astar"``: run A* over the CSR graph, guided by the straight-line
+      distance between ``coordinates``; needs a position for every node.
+    - ``"networkx"``: run ``nx.shortest_path`` on every call.
+
+    The table and CSR backends return the same routes as ``nx.dijkstra_path``.
+    ``nx.shortest_path`` searches bidirectionally and may pick a different
+    route of equal cost when there are ties.
+
+    ``indoor`` maps buildings to floor plans (see :class:`FloorPlan`); their
+    rooms can be used as places in :meth:`find_path`.
+
+    ``congestion`` maps time slots to ``{(start, end): multiplier}`` (see
+    :mod:`congestion`).  Queries given a ``departure`` time cost every path
+    by its multiplier in that slot; slots with the same multipliers share
+    one route table.  The default campus loads ``congestion.json``.
+    """
+
+    def __init__(self, buildings=None, paths=None, backend="table", coordinates=None,
+                 indoor=None, congestion=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"backend not supported: {backend}")
+        self.buildings = BUILDINGS if buildings is None else buildings
+        self.paths = PATHS if paths is None else paths
+        if coordinates is None:
+            coordinates = COORDINATES if paths is None else {}
+        self.coordinates = coordinates
+        if indoor is None:
+            indoor = INDOOR if paths is None else {}
+        self.indoor = indoor
+        if congestion is None:
+            congestion = load_congestion() if paths is None else {}
+        self.congestion = congestion
+        self._profile_weights = {}
+        self.backend = backend
+        self.fingerprint = graph_fingerprint(self.buildings, self.paths, self.coordinates)
+        self._alternatives = OrderedDict()
+        self._alternatives_lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        # Build the structure the backend searches up front; the other one is
+        # only built if something asks for it.
+        if backend == "networkx":
+            self.graph
+        elif self.csr.x is None and backend == "astar":
+            raise ValueError("the astar backend needs coordinates for every node")
+        self.components
+
+    @cached_property
+    def graph(self):
+        return self._build_graph()
+
+    @cached_property
+    def csr(self):
+        with span("build_csr"):
+            return CSRGraph(self.paths, PREFERENCE_WEIGHTS, self.coordinates)
+
+    @cached_property
+    def components(self):
+        """Connected-component label per CSR node, used to reject hopeless queries."""
+        return self.csr.components()
+
+    @cached_property
+    def floor_plans(self):
+        return {building: FloorPlan(building, layout) for building, layout in self.indoor.items()}
+
+    @cached_property
+    def rooms(self):
+        """Building of every room in the floor plans."""
+        rooms = {}
+        for building, plan in self.floor_plans.items():
+            for room in plan.rooms:
+                if room in rooms or room in self.csr.index or room in self.buildings:
+                    raise ValueError(f"room {room!r} in {building} is not a unique name")
+                rooms[room] = building
+        return rooms
+
+    @cached_property
+    def slot_profiles(self):
+        """Congestion profile of every time slot, or ``None`` if uncongested.
+
+        A profile is the tuple of ``(edge id, multiplier)`` pairs in effect,
+        sorted by edge, so slots with the same multipliers compare equal.
+        """
+        csr = self.csr
+        profiles = [None] * SLOTS_PER_DAY
+        unknown = set()
+        for slot, multipliers in self.congestion.items():
+            edges = {}
+            for (start, end), multiplier in multipliers.items():
+                edge = csr.edge(csr.index[start], csr.index[end]) \
+                    if start in csr.index and end in csr.index else -1
+                if edge == -1:
+                    unknown.add((start, end))
+                else:
+                    # The same path may be listed in both directions; as in
+                    # load_congestion, the largest multiplier wins.
+                    edges[edge] = max(edges.get(edge, multiplier), multiplier)
+            edges = {edge: multiplier for edge, multiplier in edges.items() if multiplier != 1}
+            if edges:
+                profiles[slot] = tuple(sorted(edges.items()))
+        for start, end in sorted(unknown):
+            logger.warning("congestion given for %r - %r, which is not a path", start, end)
+        return profiles
+
+    def _profile(self, departure):
+        return None if departure is None else self.slot_profiles[slot_of(departure)]
+
+    def congested(self, departure):
+        """Whether ``departure`` falls in a slot with any congestion multipliers."""
+        return self._profile(departure) is not None
+
+    def _profile_weight(self, key, profile):
+        # Edge costs of preference ``key`` with a profile's multipliers applied.
+        weight = self._profile_weights.get((key, profile))
+        if weight is None:
+            csr = self.csr
+            weight = array("d", csr.weights[key])
+            for edge, multiplier in profile:
+                for e in csr.edge_slots(edge):
+                    weight[e] *= multiplier
+            self._profile_weights[(key, profile)] = weight
+        return weight
+
+    def _slot_weight(self, preference, departure):
+        """Route-table key and edge costs for ``preference`` at ``departure``."""
+        key = preference_key(preference)
+        profile = self._profile(departure)
+        if profile is None:
+            return key, self.csr.weights[key]
+        return (key, profile), self._profile_weight(key, profile)
+
+    def _networkx_weight(self, preference, departure):
+        # networkx only skips an edge whose weight is None, so an INF cost
+        # (stairs for step-free routes) becomes None instead.
+        weight = PREFERENCE_WEIGHTS[preference_key(preference)]
+        profile = self._profile(departure)
+        if profile is None and not callable(weight):
+            return weight
+        multipliers, csr = dict(profile or ()), self.csr
+
+        def cost(u, v, d):
+            value = weight(u, v, d) if callable(weight) else d.get(weight, 1)
+            if multipliers:
+                value *= multipliers.get(csr.edge(csr.index[u], csr.index[v]), 1)
+            return None if value == INF else value
+        return cost
+
+    @cached_property
+    def facility_index(self):
+        return FacilityIndex(self.buildings, self.csr)
+
+    @timed()
+    def nearest_facility(self, start, facility, preference):
+        """:class:`Route` from ``start`` to the closest place offering ``facility``.
+
+        Returns ``None`` when no holder is reachable; raises ``ValueError`` for
+        a facility no building lists and ``nx.NodeNotFound`` for unknown places.
+        """
+        count("queries", kind="nearest")
+        self._on_graph(start)
+        path = self.facility_index.nearest(start, facility, preference_key(preference))
+        return None if path is None else self._route(path)
+
+    def connected(self, start, end):
+        """Whether a route exists between two places, without searching.
+
+        Buildings with no path at all are only connected to themselves;
+        unknown names raise ``nx.NodeNotFound``.
+        """
+        start_on_graph, end_on_graph = self._on_graph(start), self._on_graph(end)
+        if start == end:
+            return True
+        if not (start_on_graph and end_on_graph):
+            return False
+        index = self.csr.index
+        return self.components[index[start]] == self.components[index[end]]
+
+    def validate(self):
+        """Report data problems: orphaned buildings, dangling paths and islands.
+
+        ``orphaned_buildings`` have no path at all, ``dangling_edges`` touch a
+        place that is neither a building nor a junction with coordinates, and
+        ``components`` lists the size of every connected part of the graph
+        (largest first), so anything beyond the first is cut off from it.
+        """
+        csr = self.csr
+        known = set(self.buildings) | set(self.coordinates)
+        sizes = {}
+        for label in self.components:
+            sizes[label] = sizes.get(label, 0) + 1
+        return {
+            "buildings": len(self.buildings),
+            "paths": len(self.paths),
+            "components": sorted(sizes.values(), reverse=True),
+            "orphaned_buildings": [b for b in self.buildings if b not in csr.index],
+            "dangling_edges": [
+                [start, end] for start, end in self.paths
+                if start not in known or end not in known
+            ],
+            "missing_coordinates": [
+                node for node in csr.nodes if node not in self.coordinates
+            ] if self.coordinates else [],
+        }
+
+    @timed("build_graph")
+    def _build_graph(self):
+        G = _networkx().Graph()
+        for (start, end), attrs in self.paths.items():
+            if not attrs.get("closed"):
+                G.add_edge(start, end, **attrs)
+        return G
+
+    def close_path(self, start, end):
+        """Take the path between two places out of service; see :meth:`update_path`."""
+        return self.update_path(start, end, closed=True)
+
+    def reopen_path(self, start, end):
+        return self.update_path(start, end, closed=False)
+
+    def set_covered(self, start, end, covered):
+        return self.update_path(start, end, covered=covered)
+
+    @timed()
+    def update_path(self, start, end, closed=None, covered=None):
+        """Close/reopen or (un)cover the path between ``start`` and ``end`` live.
+
+        Only what the change can affect is redone: route-table rows and
+        facility searches whose shortest-path tree uses (or could now use)
+        the path, cached alternatives that walk it and the component labels.
+        ``paths`` and ``fingerprint`` are replaced, so the figure cache and the
+        shared route tables follow.  Raises ``nx.NodeNotFound`` for unknown
+        places and ``ValueError`` if they are not joined by a path.  Returns
+        how much was recomputed.
+        """
+        csr = self.csr
+        u, v = _lookup(csr.index, start), _lookup(csr.index, end)
+        edge = csr.edge(u, v)
+        if edge == -1:
+            raise ValueError(f"no path between {start} and {end}")
+        with self._update_lock:
+            was_closed = csr.edge_closed[edge]
+            changes = csr.set_edge(edge, closed, covered)
+            path_key = (start, end) if (start, end) in self.paths else (end, start)
+            attrs = dict(self.paths[path_key], covered=bool(csr.edge_covered[edge]))
+            attrs.pop("closed", None)
+            if csr.edge_closed[edge]:
+                attrs["closed"] = True
+            self.paths = dict(self.paths)
+            self.paths[path_key] = attrs
+            old_fingerprint = self.fingerprint
+            # Published only once the repaired tables are registered under it:
+            # a query seeing it earlier would miss them and rebuild from scratch.
+            fingerprint = graph_fingerprint(self.buildings, self.paths, self.coordinates)
+
+            if "graph" in self.__dict__:
+                if attrs.get("closed"):
+                    if self.graph.has_edge(start, end):
+                        self.graph.remove_edge(start, end)
+                else:
+                    self.graph.add_edge(start, end, **attrs)
+            if was_closed != csr.edge_closed[edge]:
+                self.components = csr.components()
+
+            for (preference, profile), weight in self._profile_weights.items():
+                if preference in changes:
+                    for e in csr.edge_slots(edge):
+                        weight[e] = csr.weights[preference][e] * dict(profile).get(edge, 1)
+
+            report = {"route_table_rows": {}, "facility_searches": 0, "alternatives_dropped": 0}
+            tables = {}
+            for (table_fingerprint, table_key), table in list(_route_tables.items()):
+                if table_fingerprint != old_fingerprint:
+                    continue
+                preference, profile = table_key if isinstance(table_key, tuple) else (table_key, None)
+                if preference in changes:
+                    old, new = changes[preference]
+                    weight, name = csr.weights[preference], preference
+                    if profile is not None:
+                        multiplier = dict(profile).get(edge, 1)
+                        old, new = old * multiplier, new * multiplier
+                        weight = self._profile_weight(preference, profile)
+                        name = f"{preference} {slot_label(self.slot_profiles.index(profile))}"
+                    table, rows = table.repaired(csr, weight, u, v, old, new)
+                    report["route_table_rows"][name] = rows
+                tables[table_key] = table
+            if tables:
+                _replace_route_tables(old_fingerprint, fingerprint, tables)
+            self.fingerprint = fingerprint
+            if "facility_index" in self.__dict__:
+                report["facility_searches"] = self.facility_index.repair(u, v, changes)
+
+            # Cached routes through the path are stale (legs record whether it
+            # is covered); a cheaper path can improve any route of that preference.
+            cheaper = {p for p, (old, new) in changes.items() if new < old}
+            with self._alternatives_lock:
+                for cached, routes in list(self._alternatives.items()):
+                    if cached[2] in cheaper or any(
+                        leg.edge == edge for route in routes for leg in route.legs
+                    ):
+                        del self._alternatives[cached]
+                        report["alternatives_dropped"] += 1
+        logger.info("path %r - %r updated (%s): %s", start, end, attrs, report)
+        return report
+
+    def route_table(self, preference, departure=None):
+        """Route table for ``preference``, congested as at ``departure``."""
+        key, weight = self._slot_weight(preference, departure)
+        return shared_route_table(self.fingerprint, key, self.csr, weight)
+
+    def route_table_ready(self, preference, departure=None):
+        """Whether ``find_path`` can answer without building a table first."""
+        if self.backend != "table":
+            return True
+        return (self.fingerprint, self._slot_weight(preference, departure)[0]) in _route_tables
+
+    def precompute_slots(self, preferences=PREFERENCE_WEIGHTS):
+        """Build the route table of every congestion profile up front."""
+        for profile in set(self.slot_profiles) - {None}:
+            slot = self.slot_profiles.index(profile)
+            for preference in preferences:
+                self.route_table(preference, slot_label(slot))
+
+    @timed()
+    def find_path(self, start, end, preference, departure=None):
+        """:class:`Route` from ``start`` to ``end`` for ``preference``.
+
+        Either end may be a room (see :meth:`find_room_path`).  With a
+        ``departure`` time (``"HH:MM"``, a ``datetime``/``time`` or minutes
+        after midnight) paths are costed with the congestion of its slot.
+        Raises ``nx.NodeNotFound`` for unknown places and :class:`NoRoute`
+        when there is no route, before any search for places in different
+        components.
+        """
+        count("queries", kind="path")
+        if start in self.rooms or end in self.rooms:
+            return self.find_room_path(start, end, preference, departure)
+        return self._campus_route(start, end, preference, departure)
+
+    def _campus_route(self, start, end, preference, departure=None):
+        if not self.connected(start, end):
+            raise no_path(start, end)
+        if start == end:
+            return Route([start])
+        return self._route(self._find_places(start, end, preference, departure))
+
+    def effective_distance(self, route, departure):
+        """Length of ``route`` with every leg stretched by its congestion at
+        ``departure``: roughly how far the walk feels at that time."""
+        multipliers = dict(self._profile(departure) or ())
+        return sum(leg.distance * multipliers.get(leg.edge, 1) for leg in route.legs)
+
+    def find_room_path(self, start, end, preference, departure=None):
+        """Room-level :class:`Route`: inside, across the campus, inside again.
+
+        Each room is joined to the campus graph through its building's
+        entrance, so the route is the walk out of the first building, the
+        campus route between the entrances and the walk in to the room;
+        between two places in the same building it stays indoors.
+        """
+        key = preference_key(preference)
+        if start == end and start in self.rooms:
+            return Route([start])
+        origin, destination = self.rooms.get(start), self.rooms.get(end)
+        if origin is not None and origin == destination:
+            plan = self.floor_plans[origin]
+            return self._indoor_route(plan, plan.between(start, end, key), start, end)
+        parts = []
+        if origin is not None:
+            plan = self.floor_plans[origin]
+            parts.append(self._indoor_route(plan, plan.to_entrance(start, key), start, end))
+        parts.append(self._campus_route(origin or start, destination or end, preference, departure))
+        if destination is not None:
+            plan = self.floor_plans[destination]
+            inward = plan.to_entrance(end, key)
+            parts.append(self._indoor_route(plan, inward and inward[::-1], start, end))
+        return Route.join(parts)
+
+    def _indoor_route(self, plan, path, start, end):
+        if path is None:
+            raise no_path(start, end)
+        legs = []
+        walked = 0
+        for a, b in zip(path, path[1:]):
+            distance, covered = plan.step(a, b)
+            walked += distance
+            legs.append(Leg(a, b, -1, distance, covered, walked))
+        return Route(path, legs)
+
+    def _find_places(self, start, end, preference, departure=None):
+        if self.backend == "table":
+            return self.route_table(preference, departure).path(start, end)
+        if self.backend in ("csr", "astar"):
+            csr = self.csr
+            _, weight = self._slot_weight(preference, departure)
+            s, t = _lookup(csr.index, start), _lookup(csr.index, end)
+            if self.backend == "astar":
+                # Multipliers below 1 make paths cheaper than the heuristic
+                # assumes, so it is scaled down to match.
+                profile = self._profile(departure) or ()
+                scale = csr.heuristic_scale[preference_key(preference)]
+                scale *= min([1] + [multiplier for _, multiplier in profile])
+                route = csr.astar(s, t, weight, scale)
+            else:
+                route = csr.shortest_path(s, t, weight)
+            if route is None:
+                raise no_path(start, end)
+            return [csr.nodes[i] for i in route]
+        nx = _networkx()
+        try:
+            return nx.shortest_path(self.graph, start, end, weight=self._networkx_weight(preference, departure))
+        except nx.NetworkXNoPath:
+            raise no_path(start, end) from None
+
+    @timed()
+    def pareto_routes(self, start, end):
+        """Every route worth offering when trading distance against rain.
+
+        Returns the Pareto front of (total distance, uncovered metres) as
+        :class:`Route` objects, from the shortest to the driest: each one is
+        longer than the one before but spends fewer metres in the open.
+        """
+        count("queries", kind="pareto")
+        if not self.connected(start, end):
+            raise no_path(start, end)
+        if start == end:
+            return [Route([start])]
+        csr = self.csr
+        s, t = csr.index[start], csr.index[end]
+        front = csr.pareto(s, t, csr.distance, csr.uncovered)
+        return [self._route([csr.nodes[i] for i in route]) for _, _, route in front]
+
+    @timed()
+    def alternative_routes(self, start, end, preference, k=3):
+        """Up to ``k`` loopless routes for ``preference``, cheapest first.
+
+        Uses Yen's algorithm over the CSR graph.  Answers are kept in a
+        per-navigator LRU cache keyed by ``(start, end, preference, k)``, so a
+        repeated query is a dictionary hit.
+        """
+        count("queries", kind="alternatives")
+        key = (start, end, preference_key(preference), k)
+        with self._alternatives_lock:
+            routes = self._alternatives.get(key)
+            if routes is not None:
+                self._alternatives.move_to_end(key)
+                count("cache_hits", cache="alternatives")
+                return list(routes)
+        count("cache_misses", cache="alternatives")
+
+        if not self.connected(start, end):
+            raise no_path(start, end)
+        if start == end:
+            routes = [Route([start])]
+        else:
+            csr = self.csr
+            found = csr.k_shortest(csr.index[start], csr.index[end], csr.weights[key[2]], k)
+            routes = [self._route([csr.nodes[i] for i in route]) for _, route in found]
+
+        with self._alternatives_lock:
+            self._alternatives[key] = routes
+            if len(self._alternatives) > ALTERNATIVES_CACHE_SIZE:
+                self._alternatives.popitem(last=False)
+        return list(routes)
+
+    @timed()
+    def find_routes(self, pairs, preference, departure=None):
+        """Routes for many ``(start, end)`` pairs at once.
+
+        Pairs are grouped by start so every distinct start is searched only
+        once (the ``astar`` backend uses plain Dijkstra here, since one search
+        serves many targets).  Returns a :data:`Route` per pair, in order, with
+        ``None`` where the places are not connected.  Pairs involving a room
+        are answered one by one with :meth:`find_room_path`.  ``departure``
+        is as for :meth:`find_path`.
+        """
+        pairs = list(pairs)
+        count("queries", len(pairs), kind="batch")
+        results = [None] * len(pairs)
+        by_start = {}
+        for i, (start, end) in enumerate(pairs):
+            if start in self.rooms or end in self.rooms:
+                try:
+                    results[i] = self.find_room_path(start, end, preference, departure)
+                except NoRoute:
+                    pass
+                continue
+            by_start.setdefault(start, []).append(i)
+
+        for start, indices in by_start.items():
+            walk = None
+            for i in indices:
+                end = pairs[i][1]
+                if not self.connected(start, end):
+                    count("no_path")
+                    continue
+                if end == start:
+                    results[i] = Route([start])
+                    continue
+                if walk is None:
+                    walk = self._routes_from(start, preference, departure)
+                path = walk(end)
+                if path is None:
+                    count("no_path")
+                    continue
+                results[i] = self._route(path)
+        return results
+
+    def find_itineraries(self, itineraries, preference, departure=None):
+        """Legs between consecutive stops of many itineraries.
+
+        All legs are answered in one :meth:`find_routes` batch, so starts
+        shared between itineraries are only searched once.  Returns a list of
+        legs per itinerary.
+        """
+        itineraries = [list(stops) for stops in itineraries]
+        pairs = [leg for stops in itineraries for leg in zip(stops, stops[1:])]
+        routes = iter(self.find_routes(pairs, preference, departure))
+        return [[next(routes) for _ in stops[1:]] for stops in itineraries]
+
+    def find_itinerary(self, stops, preference, departure=None):
+        """Legs of a single multi-stop itinerary, e.g. a day's timetable."""
+        return self.find_itineraries([stops], preference, departure)[0]
+
+    def _on_graph(self, node):
+        # Known buildings without any path are simply unreachable; names that
+        # are not on the campus at all are an error.
+        if node in self.csr.index:
+            return True
+        if node in self.buildings:
+            return False
+        raise node_not_found(node)
+
+    def _routes_from(self, start, preference, departure=None):
+        """Function mapping a destination to the route from ``start`` (or ``None``)."""
+        if self.backend == "networkx":
+            _, paths = _networkx().single_source_dijkstra(
+                self.graph, start, weight=self._networkx_weight(preference, departure)
+            )
+            return paths.get
+
+        csr = self.csr
+        nodes, index = csr.nodes, csr.index
+        s = index[start]
+        if self.backend == "table":
+            table = self.route_table(preference, departure)
+            route_to = lambda t: table.walk(s, t)
+        else:
+            dist, pred = csr.dijkstra(s, self._slot_weight(preference, departure)[1])
+            route_to = lambda t: csr.walk(pred, s, t) if dist[t] != INF else None
+
+        def walk(end):
+            route = route_to(index[end])
+            return None if route is None else [nodes[i] for i in route]
+        return walk
+
+    def _route(self, path):
+        if len(path) < 2:
+            return Route(path)
+        csr = self.csr
+        index, edge_index, n = csr.index, csr.edge_index, len(csr)
+        edge_distance, edge_covered = csr.edge_distance, csr.edge_covered
+        legs = []
+        walked = 0
+        u = index[path[0]]
+        for a, b in zip(path, path[1:]):
+            v = index[b]
+            edge = edge_index[u * n + v if u < v else v * n + u]
+            walked += edge_distance[edge]
+            legs.append(Leg(a, b, edge, edge_distance[edge], bool(edge_covered[edge]), walked))
+            u = v
+        return Route(path, legs)
+
+
+_navigator = None
+_navigator_data = None
+
+
+def get_navigator():
+    """Navigator over the default campus data, shared across sessions.
+
+    The route tables of every congested time slot are built with it, so
+    peak-time queries are table walks like any other.  Path updates made on
+    it are kept until the campus data itself changes.
+    """
+    global _navigator, _navigator_data
+    navigator = _navigator
+    fingerprint = (graph_fingerprint(BUILDINGS, PATHS, COORDINATES), tuple(PREFERENCE_WEIGHTS))
+    if navigator is None or _navigator_data != fingerprint:
+        navigator = _navigator = CampusNavigator()
+        _navigator_data = fingerprint
+        log_validation(navigator.validate())
+        navigator.precompute_slots()
+    return navigator
+
+
+def log_validation(report):
+    if len(report["components"]) > 1:
+        logger.warning("campus graph has %d disconnected parts (sizes %s)",
+                       len(report["components"]), report["components"])
+    for name in report["orphaned_buildings"]:
+        logger.warning("building %r has no paths and cannot be routed to", name)
+    for start, end in report["dangling_edges"]:
+        logger.warning("path %r - %r leads to an unknown place", start, end)
+    for name in report["missing_coordinates"]:
+        logger.warning("%r has no coordinates", name)
@@ -0,0 +1,312 @@
+"""Offline route bundles for kiosks.
+
+A bundle holds every route between two places of the campus graph for every
+route preference, so a kiosk can give directions with no network and no
+networkx::
+
+    python route_bundle.py export campus.routes
+    python route_bundle.py check campus.routes
+    python route_bundle.py route campus.routes Gate CSE1 --preference Covered
+
+``route`` warns on stderr when the bundle no longer matches the campus data,
+and exits with 1 when there is no route.
+
+Layout: the magic ``CNAVRB01``, a little-endian ``uint32`` header length and a
+JSON header (graph fingerprint, places, paths, building directory and
+section offsets), then, from the next multiple of 8 bytes, three ``n * n``
+sections per preference, each 8-byte aligned: the predecessor matrix of
+:class:`navigator.RouteTable` (``int16``, or ``int32`` past 32767 places) and
+the metres and covered metres of every route (``float32``, ``inf`` where
+there is no route).
+
+:class:`RouteBundle` needs nothing beyond the standard library.  It
+memory-maps the file, so opening a bundle only parses the header and a query
+only touches the entries along its route.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+
+MAGIC = b"CNAVRB01"
+ALIGN = 8
+SECTIONS = ("next_hop", "metres", "covered")
+INF = float("inf")
+
+
+def _aligned(size):
+    return size + -size % ALIGN
+
+
+def _route_metres(table, csr, s):
+    # Metres and covered metres from s to every place.  Each route is walked
+    # back only as far as the first place already filled in.
+    n = len(table.nodes)
+    row = s * n
+    next_hop, edge_index = table.next_hop, csr.edge_index
+    edge_distance, edge_covered = csr.edge_distance, csr.edge_covered
+    metres = array("d", [INF]) * n
+    covered = array("d", [INF]) * n
+    metres[s] = covered[s] = 0.0
+    for t in range(n):
+        if metres[t] != INF or table.dist[row + t] == INF:
+            continue
+        chain = [t]
+        while metres[chain[-1]] == INF:
+            chain.append(next_hop[row + chain[-1]])
+        for i in range(len(chain) - 2, -1, -1):
+            v, u = chain[i], chain[i + 1]
+            edge = edge_index[u * n + v if u < v else v * n + u]
+            metres[v] = metres[u] + edge_distance[edge]
+            covered[v] = covered[u] + (edge_distance[edge] if edge_covered[edge] else 0.0)
+    return metres, covered
+
+
+def build_bundle(navigator):
+    """Bundle of every route on ``navigator``'s graph, as bytes."""
+    from navigator import PREFERENCE_WEIGHTS
+
+    csr = navigator.csr
+    n = len(csr)
+    hop_type = "h" if n <= 32767 else "i"
+    header = {
+        "fingerprint": navigator.fingerprint,
+        "nodes": csr.nodes,
+        "hop_type": hop_type,
+        # [u, v, metres, covered] per path, u and v indexing "nodes".
+        "paths": [
+            [csr.edge_ends[2 * e], csr.edge_ends[2 * e + 1], csr.edge_distance[e], bool(csr.edge_covered[e])]
+            for e in range(len(csr.edge_distance))
+        ],
+        "buildings": navigator.buildings,
+        "coordinates": {name: list(xy) for name, xy in navigator.coordinates.items()},
+        "preferences": {},
+    }
+    body = []
+    offset = 0
+    for preference in PREFERENCE_WEIGHTS:
+        table = navigator.route_table(preference)
+        metres, covered = array("f"), array("f")
+        for s in range(n):
+            row_metres, row_covered = _route_metres(table, csr, s)
+            metres.extend(row_metres.tolist())
+            covered.extend(row_covered.tolist())
+        offsets = header["preferences"][preference] = {}
+        for name, data in zip(SECTIONS, (array(hop_type, table.next_hop), metres, covered)):
+            if sys.byteorder != "little":
+                data.byteswap()
+            raw = data.tobytes()
+            offsets[name] = offset
+            body.append(raw + b"\0" * (_aligned(len(raw)) - len(raw)))
+            offset += len(body[-1])
+
+    encoded = json.dumps(header, separators=(",", ":")).encode()
+    prefix = MAGIC + struct.pack("<I", len(encoded)) + encoded
+    return prefix + b"\0" * (_aligned(len(prefix)) - len(prefix)) + b"".join(body)
+
+
+_bundles = {}
+_bundles_lock = threading.Lock()
+
+
+def cached_bundle(navigator):
+    """:func:`build_bundle`, built once per graph fingerprint."""
+    from metrics import count
+
+    data = _bundles.get(navigator.fingerprint)
+    if data is None:
+        count("cache_misses", cache="bundle")
+        with _bundles_lock:
+            data = _bundles.get(navigator.fingerprint)
+            if data is None:
+                data = build_bundle(navigator)
+                _bundles.clear()
+                _bundles[navigator.fingerprint] = data
+    else:
+        count("cache_hits", cache="bundle")
+    return data
+
+
+def export_bundle(path, navigator=None):
+    """Write the bundle for ``navigator`` (default: the shared campus one) to ``path``.
+
+    The file is replaced atomically, so a kiosk never opens half a bundle.
+    """
+    if navigator is None:
+        from navigator import get_navigator
+        navigator = get_navigator()
+    data = build_bundle(navigator)
+    partial = f"{path}.partial"
+    with open(partial, "wb") as f:
+        f.write(data)
+    os.replace(partial, path)
+    return len(data)
+
+
+class RouteBundle:
+    """Routes answered from a memory-mapped bundle file.
+
+    Pass ``fingerprint`` to refuse a bundle built from other campus data;
+    otherwise compare :attr:`fingerprint` yourself.  Raises ``ValueError``
+    for a file that is not a bundle or is stale.
+    """
+
+    def __init__(self, path, fingerprint=None):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self._map[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a route bundle")
+            (length,) = struct.unpack_from("<I", self._map, len(MAGIC))
+            start = len(MAGIC) + 4
+            header = json.loads(self._map[start:start + length])
+            if fingerprint is not None and header["fingerprint"] != fingerprint:
+                raise ValueError(f"{path} was built from different campus data")
+        except Exception:
+            self._map.close()
+            raise
+        self.fingerprint = header["fingerprint"]
+        self.nodes = header["nodes"]
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.buildings = header["buildings"]
+        self.coordinates = header["coordinates"]
+        self.preferences = list(header["preferences"])
+        self.paths = {}
+        for edge, (u, v, metres, covered) in enumerate(header["paths"]):
+            self.paths[(u, v)] = self.paths[(v, u)] = (edge, metres, covered)
+
+        base = _aligned(start + length)
+        n = len(self.nodes)
+        types = {"next_hop": header["hop_type"], "metres": "f", "covered": "f"}
+        view = memoryview(self._map)
+        self._views = [view]
+        self._sections = {}
+        for preference, offsets in header["preferences"].items():
+            sections = {}
+            for name, typecode in types.items():
+                begin = base + offsets[name]
+                raw = view[begin:begin + n * n * array(typecode).itemsize]
+                self._views.append(raw)
+                if sys.byteorder == "little":
+                    sections[name] = raw.cast(typecode)
+                    self._views.append(sections[name])
+                else:
+                    data = array(typecode, raw)
+                    data.byteswap()
+                    sections[name] = data
+            self._sections[preference] = sections
+
+    def close(self):
+        self._sections = {}
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def route(self, start, end, preference="Shortest"):
+        """The route as :meth:`navigator.Route.as_dict` gives it, or ``None``.
+
+        Buildings without any path have no route except to themselves.
+        Raises ``KeyError`` for unknown places or preferences.
+        """
+        for place in (start, end):
+            if place not in self.index and place not in self.buildings:
+                raise KeyError(f"{place} is not in the bundle")
+        if preference not in self._sections:
+            raise KeyError(f"no routes for preference {preference!r} in the bundle")
+        if start not in self.index or end not in self.index:
+            if start != end:
+                return None
+            return {"start": start, "end": end, "path": [start], "distance": 0, "covered": 0, "legs": []}
+        s, t = self.index[start], self.index[end]
+        sections = self._sections[preference]
+        row = s * len(self.nodes)
+        if sections["metres"][row + t] == INF:
+            return None
+        next_hop = sections["next_hop"]
+        route = [t]
+        while t != s:
+            t = next_hop[row + t]
+            route.append(t)
+        route.reverse()
+
+        nodes = self.nodes
+        legs = []
+        walked = covered = 0
+        for u, v in zip(route, route[1:]):
+            edge, metres, is_covered = self.paths[(u, v)]
+            walked += metres
+            covered += metres if is_covered else 0
+            legs.append({
+                "start": nodes[u], "end": nodes[v], "edge": edge,
+                "distance": metres, "covered": is_covered, "cumulative": walked,
+            })
+        return {
+            "start": start,
+            "end": end,
+            "path": [nodes[i] for i in route],
+            "distance": walked,
+            "covered": covered,
+            "legs": legs,
+        }
+
+
+def is_current(bundle):
+    """Whether ``bundle`` was built from the campus data on this machine."""
+    from campus_data import BUILDINGS, COORDINATES, PATHS
+    from navigator import graph_fingerprint
+
+    return bundle.fingerprint == graph_fingerprint(BUILDINGS, PATHS, COORDINATES)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline campus route bundles")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write the bundle for the campus data")
+    export.add_argument("path")
+    check = commands.add_parser("check", help="exit 1 if the bundle is stale")
+    check.add_argument("path")
+    route = commands.add_parser("route", help="print one route from a bundle")
+    route.add_argument("path")
+    route.add_argument("start")
+    route.add_argument("end")
+    route.add_argument("--preference", default="Shortest")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        size = export_bundle(args.path)
+        print(f"wrote {size} bytes to {args.path}")
+    elif args.command == "check":
+        with RouteBundle(args.path) as bundle:
+            current = is_current(bundle)
+        print("current" if current else "stale")
+        return 0 if current else 1
+    else:
+        with RouteBundle(args.path) as bundle:
+            if not is_current(bundle):
+                print(f"warning: {args.path} was built from different campus data; "
+                      f"re-export it", file=sys.stderr)
+            try:
+                route = bundle.route(args.start, args.end, args.preference)
+            except KeyError as e:
+                print(e.args[0], file=sys.stderr)
+                return 2
+        if route is None:
+            print(f"No path between {args.start} and {args.end}.", file=sys.stderr)
+            return 1
+        print(json.dumps(route, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
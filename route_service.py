@@ -0,0 +1,299 @@
+"""Headless JSON routing service for kiosks and the mobile app.
+
+Loads the campus graph once, warms the route tables and answers requests on
+a thread per connection::
+
+    python route_service.py --port 8502
+
+Endpoints:
+
+- ``GET /health``
+- ``GET /metrics``: timing spans and counters in the Prometheus text format
+  (empty unless started with ``--metrics`` or ``CAMPUS_METRICS=1``).
+- ``GET /buildings``: the building directory with coordinates.
+- ``GET /preferences``: the route preferences on offer, with display labels.
+- ``GET /rooms``: the rooms of every building with a floor plan.
+- ``GET /search?q=girls hostle&limit=10``: typo-tolerant search over the
+  buildings and rooms directory, best match first.
+- ``GET /route?start=Gate&end=CSE1&preference=Shortest`` (either end may be a
+  room, e.g. ``CSE1-104``); add ``departure=09:50`` to route around the
+  congestion of that time and ``overlay=1`` for a Plotly trace of the route
+  to draw over ``/map/figure``.
+- ``GET /nearest?start=Gate&facility=Labs&preference=Shortest``: route to
+  the closest building offering a facility.
+- ``GET /bundle``: the offline route bundle for kiosks (see :mod:`route_bundle`).
+- ``GET /map/figure``: the whole campus as a Plotly figure, built once.
+- ``GET /map?width=960``: the campus map variant best suited to that width.
+- ``GET /map/tiles/<col>/<row>``: one tile of the full-resolution map.
+- ``POST /routes`` with ``{"pairs": [["Gate", "CSE1"], ...]}`` or
+  ``{"itineraries": [["Boys Hostel", "CSE1", "AIML"], ...]}`` and an optional
+  ``"preference"`` and ``"departure"``.
+- ``POST /paths`` with ``{"start": "Gate", "end": "Placements", "closed": true}``
+  and/or ``"covered"`` (JSON booleans): close, reopen or re-cover a path while
+  serving.  The only endpoint that changes anything, so it answers 403 unless
+  the service is started with ``--allow-path-updates``.
+"""
+import argparse
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import networkx as nx
+
+from campus_data import BUILDINGS, COORDINATES
+from campus_figure import base_figure_json, route_overlay
+from directory import get_directory
+from map_assets import load_map
+import metrics
+from navigator import (
+    BACKENDS, PREFERENCE_LABELS, PREFERENCE_WEIGHTS, CampusNavigator, get_navigator, log_validation,
+)
+from route_bundle import cached_bundle
+
+
+def route_json(route):
+    return None if route is None else route.as_dict()
+
+
+class RouteRequestHandler(BaseHTTPRequestHandler):
+    navigator = None
+    allow_path_updates = False
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle enabled the body
+    # waits for the client's delayed ACK (~40 ms) on keep-alive connections.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            return self.send_json(200, {"status": "ok", "backend": self.navigator.backend})
+        if url.path == "/metrics":
+            return self.send_bytes(200, metrics.prometheus_text().encode(), "text/plain; version=0.0.4")
+        if url.path == "/buildings":
+            return self.send_json(200, {
+                name: dict(details, coordinates=COORDINATES.get(name))
+                for name, details in BUILDINGS.items()
+            })
+        if url.path == "/preferences":
+            return self.send_json(200, PREFERENCE_LABELS)
+        if url.path == "/rooms":
+            return self.send_json(200, {
+                building: list(plan.rooms) for building, plan in self.navigator.floor_plans.items()
+            })
+        if url.path == "/search":
+            return self.answer_search(parse_qs(url.query))
+        if url.path == "/route":
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            if "start" not in query or "end" not in query:
+                return self.send_json(400, {"error": "start and end are required"})
+            return self.answer_route(query["start"], query["end"], query.get("preference", "Shortest"),
+                                     query.get("overlay") == "1", query.get("departure"))
+        if url.path == "/map/figure":
+            return self.answer_figure()
+        if url.path == "/bundle":
+            return self.answer_bundle()
+        if url.path == "/nearest":
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            if "start" not in query or "facility" not in query:
+                return self.send_json(400, {"error": "start and facility are required"})
+            return self.answer_nearest(query["start"], query["facility"], query.get("preference", "Shortest"))
+        if url.path == "/map" or url.path.startswith("/map/tiles/"):
+            return self.answer_map(url)
+        self.send_json(404, {"error": f"unknown endpoint {url.path}"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path not in ("/routes", "/paths"):
+            return self.send_json(404, {"error": f"unknown endpoint {url.path}"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            return self.send_json(400, {"error": "request body must be a JSON object"})
+        if url.path == "/paths":
+            return self.answer_path_update(body)
+        preference = body.get("preference", "Shortest")
+        departure = body.get("departure")
+        if self.reject_preference(preference):
+            return
+        try:
+            if "itineraries" in body:
+                legs = self.navigator.find_itineraries(body["itineraries"], preference, departure)
+                return self.send_json(200, {
+                    "itineraries": [[route_json(leg) for leg in itinerary] for itinerary in legs]
+                })
+            if "pairs" in body:
+                routes = self.navigator.find_routes(body["pairs"], preference, departure)
+                return self.send_json(200, {"routes": [route_json(route) for route in routes]})
+        except nx.NodeNotFound as e:
+            return self.send_json(404, {"error": str(e)})
+        except (TypeError, ValueError):
+            return self.send_json(400, {"error": "pairs must be [start, end] lists and departure HH:MM"})
+        self.send_json(400, {"error": "expected pairs or itineraries"})
+
+    def answer_route(self, start, end, preference, overlay=False, departure=None):
+        if self.reject_preference(preference):
+            return
+        try:
+            route = self.navigator.find_routes([(start, end)], preference, departure)[0]
+        except nx.NodeNotFound as e:
+            return self.send_json(404, {"error": str(e)})
+        except ValueError:
+            return self.send_json(400, {"error": "departure must be HH:MM"})
+        if route is None:
+            return self.send_json(404, {"error": f"No path between {start} and {end}."})
+        payload = route_json(route)
+        if departure is not None:
+            payload["effective_distance"] = self.navigator.effective_distance(route, departure)
+        if overlay:
+            payload["overlay"] = route_overlay(route, self.navigator.coordinates)
+        self.send_json(200, payload)
+
+    def answer_search(self, query):
+        try:
+            limit = int(query.get("limit", ["10"])[-1])
+        except ValueError:
+            return self.send_json(400, {"error": "limit must be an integer"})
+        matches = get_directory().search(query.get("q", [""])[-1], max(0, limit))
+        self.send_json(200, [entry._asdict() for entry in matches])
+
+    def answer_nearest(self, start, facility, preference):
+        if self.reject_preference(preference):
+            return
+        try:
+            route = self.navigator.nearest_facility(start, facility, preference)
+        except (nx.NodeNotFound, ValueError) as e:
+            return self.send_json(404, {"error": str(e)})
+        if route is None:
+            return self.send_json(404, {"error": f"No {facility} reachable from {start}."})
+        self.send_json(200, route_json(route))
+
+    def answer_path_update(self, body):
+        if not self.allow_path_updates:
+            return self.send_json(403, {"error": "path updates are disabled on this service"})
+        if "start" not in body or "end" not in body:
+            return self.send_json(400, {"error": "start and end are required"})
+        for field in ("closed", "covered"):
+            # update_path takes any truthy value, so "false" would close a path.
+            if field in body and not isinstance(body[field], bool):
+                return self.send_json(400, {"error": f"{field} must be true or false"})
+        try:
+            report = self.navigator.update_path(body["start"], body["end"],
+                                                body.get("closed"), body.get("covered"))
+        except (nx.NodeNotFound, ValueError) as e:
+            return self.send_json(404, {"error": str(e)})
+        self.send_json(200, report)
+
+    def answer_figure(self):
+        # The base figure only changes with the campus data, so clients can
+        # keep it and revalidate cheaply.
+        if not self.not_modified():
+            body = base_figure_json(self.navigator).encode()
+            self.send_bytes(200, body, "application/json", {"ETag": f'"{self.navigator.fingerprint}"'})
+
+    def answer_bundle(self):
+        if not self.not_modified():
+            self.send_bytes(200, cached_bundle(self.navigator), "application/octet-stream",
+                            {"ETag": f'"{self.navigator.fingerprint}"'})
+
+    def not_modified(self):
+        # Answers 304 and returns True if the client holds the current graph's version.
+        etag = f'"{self.navigator.fingerprint}"'
+        if self.headers.get("If-None-Match") != etag:
+            return False
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return True
+
+    def answer_map(self, url):
+        try:
+            campus_map = load_map()
+        except OSError:
+            return self.send_json(404, {"error": "campus map image not found"})
+        if url.path == "/map":
+            query = parse_qs(url.query)
+            try:
+                width = int(query.get("width", [campus_map.width])[-1])
+            except ValueError:
+                return self.send_json(400, {"error": "width must be an integer"})
+            image = campus_map.for_width(width)
+        else:
+            try:
+                col, row = (int(part) for part in url.path[len("/map/tiles/"):].split("/"))
+            except ValueError:
+                return self.send_json(400, {"error": "expected /map/tiles/<col>/<row>"})
+            image = campus_map.tile(col, row)
+            if image is None:
+                return self.send_json(404, {"error": f"no tile {col}/{row}"})
+        self.send_bytes(200, image.data, image.mime)
+
+    def reject_preference(self, preference):
+        # Answers 400 and returns True if ``preference`` is not registered.
+        if preference in PREFERENCE_WEIGHTS:
+            return False
+        self.send_json(400, {"error": f"unknown preference {preference!r}",
+                             "preferences": list(PREFERENCE_WEIGHTS)})
+        return True
+
+    def send_json(self, status, payload):
+        self.send_bytes(status, json.dumps(payload).encode(), "application/json")
+
+    def send_bytes(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Per-request logging to stderr costs more than answering a route.
+        pass
+
+
+def make_server(host="127.0.0.1", port=8502, backend="table", allow_path_updates=False):
+    if backend == "table":
+        navigator = get_navigator()
+        for preference in PREFERENCE_WEIGHTS:
+            navigator.route_table(preference)
+    else:
+        navigator = CampusNavigator(backend=backend)
+        log_validation(navigator.validate())
+    handler = type("Handler", (RouteRequestHandler,),
+                   {"navigator": navigator, "allow_path_updates": allow_path_updates})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Campus routing JSON service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--backend", choices=BACKENDS, default="table")
+    parser.add_argument("--metrics", action="store_true", help="record timings and counters for /metrics")
+    parser.add_argument("--allow-path-updates", action="store_true",
+                        help="accept POST /paths to close, reopen or re-cover paths")
+    args = parser.parse_args(argv)
+    if args.metrics:
+        metrics.enable()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    server = make_server(args.host, args.port, args.backend, args.allow_path_updates)
+    print(f"routing service listening on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
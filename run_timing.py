@@ -0,0 +1,46 @@
+"""Cold-start and rerun timings for the Streamlit app.
+
+Streamlit re-executes ``app.py`` on every interaction, so the numbers that
+must survive between reruns live in this imported module, once per process.
+"""
+import logging
+import threading
+import time
+
+from metrics import observe
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_runs = 0
+_cold_start_s = None
+_last_run_s = None
+_warm_total_s = 0.0
+
+
+def record_run(started):
+    """Record a script run that began at ``time.perf_counter()`` == ``started``."""
+    global _runs, _cold_start_s, _last_run_s, _warm_total_s
+    elapsed = time.perf_counter() - started
+    observe("script_run", elapsed)
+    with _lock:
+        _runs += 1
+        _last_run_s = elapsed
+        if _cold_start_s is None:
+            _cold_start_s = elapsed
+            logger.info("cold start: first script run took %.1f ms", elapsed * 1000)
+        else:
+            _warm_total_s += elapsed
+    return elapsed
+
+
+def timing_report():
+    """Cold start, last run and mean warm rerun time for this process, in seconds."""
+    with _lock:
+        warm_runs = _runs - 1 if _runs else 0
+        return {
+            "runs": _runs,
+            "cold_start_s": _cold_start_s,
+            "last_run_s": _last_run_s,
+            "mean_rerun_s": _warm_total_s / warm_runs if warm_runs else None,
+        }
@@ -0,0 +1,49 @@
+import math
+import random
+
+FACILITIES = [
+    "Labs", "Classrooms", "Faculty Rooms", "Office", "Meeting Rooms",
+    "Mess", "Rooms", "Parking", "Computer Labs", "Seating Area",
+]
+SPACING = 10
+
+
+def generate_campus(n_nodes, covered_share=0.7, seed=0):
+    """Random campus shaped like ``BUILDINGS``/``PATHS`` with ``n_nodes`` buildings.
+
+    Buildings sit on a roughly square grid.  Every row is a connected walkway
+    and the first column links the rows, so the whole campus is connected; the
+    remaining vertical links are kept at random.  ``covered_share`` is the
+    probability that a path is covered.  Grid points are ``SPACING`` metres
+    apart and no path is shorter than that.
+
+    Returns ``(buildings, paths, coordinates)``.
+    """
+    rng = random.Random(seed)
+    width = max(1, math.isqrt(n_nodes))
+    names = [f"B{i}" for i in range(n_nodes)]
+
+    buildings = {}
+    coordinates = {}
+    for i, name in enumerate(names):
+        row, col = divmod(i, width)
+        coordinates[name] = (col * SPACING, row * SPACING)
+        buildings[name] = {
+            "location": f"Block {row}-{col}",
+            "facilities": rng.sample(FACILITIES, 2),
+        }
+
+    paths = {}
+    for i in range(n_nodes):
+        col = i % width
+        neighbours = []
+        if col + 1 < width and i + 1 < n_nodes:
+            neighbours.append(i + 1)
+        if i + width < n_nodes and (col == 0 or rng.random() < 0.6):
+            neighbours.append(i + width)
+        for j in neighbours:
+            paths[(names[i], names[j])] = {
+                "distance": rng.randint(SPACING, 2 * SPACING),
+                "covered": rng.random() < covered_share,
+            }
+    return buildings, paths, coordinates
@@ -0,0 +1,90 @@
+import datetime
+import itertools
+import json
+import logging
+
+import networkx as nx
+import pytest
+
+from congestion import SLOTS_PER_DAY, campus_now, load_congestion, slot_label, slot_of
+from navigator import BACKENDS, PREFERENCE_WEIGHTS, CampusNavigator, NoRoute
+
+
+def test_slots():
+    assert slot_of("09:55") == slot_of(datetime.time(9, 50)) == slot_of(9 * 60 + 59) == 59
+    assert slot_of(datetime.datetime(2026, 1, 5, 23, 59)) == SLOTS_PER_DAY - 1
+    assert slot_of(24 * 60 + 5) == 0
+    assert slot_label(59) == "09:50"
+    assert all(slot_of(slot_label(slot)) == slot for slot in range(SLOTS_PER_DAY))
+    for text in ("24:00", "12:60", "noon"):
+        with pytest.raises(ValueError):
+            slot_of(text)
+    now = campus_now()
+    assert now.second == now.microsecond == 0
+
+
+def test_load_congestion(tmp_path):
+    path = tmp_path / "congestion.json"
+    path.write_text(json.dumps([
+        {"path": ["A", "B"], "slots": ["09:50", "09:55", "10:40"], "multiplier": 2},
+        {"path": ["A", "B"], "slots": ["09:51"], "multiplier": 3},
+        {"path": ["A", "B"], "slots": ["10:40"], "multiplier": 1.5},
+        {"path": ["B", "C"], "slots": ["00:00"], "multiplier": 0.5},
+    ]))
+    assert load_congestion(path) == {
+        59: {("A", "B"): 3.0},
+        64: {("A", "B"): 2.0},
+        0: {("B", "C"): 0.5},
+    }
+    assert load_congestion(tmp_path / "missing.json") == {}
+    path.write_text(json.dumps([{"path": ["A", "B"], "slots": ["09:50"], "multiplier": 0}]))
+    with pytest.raises(ValueError):
+        load_congestion(path)
+
+
+def test_slot_profiles(caplog):
+    paths = {
+        ("A", "B"): {"distance": 10, "covered": True},
+        ("B", "C"): {"distance": 10, "covered": True},
+        ("A", "C"): {"distance": 25, "covered": True},
+    }
+    congestion = {
+        1: {("A", "B"): 2, ("B", "A"): 3, ("B", "C"): 1},
+        2: {("B", "A"): 3, ("A", "B"): 2},
+        3: {("B", "C"): 1},
+        4: {("A", "X"): 2},
+    }
+    with caplog.at_level(logging.WARNING, logger="navigator"):
+        navigator = CampusNavigator({}, paths, congestion=congestion)
+        profiles = navigator.slot_profiles
+    ab = navigator.csr.edge(navigator.csr.index["A"], navigator.csr.index["B"])
+    # Listed both ways, the larger multiplier wins; multipliers of 1 are dropped.
+    assert profiles[1] == profiles[2] == ((ab, 3),)
+    assert profiles[0] is profiles[3] is profiles[4] is None
+    assert "'A' - 'X'" in caplog.text
+
+    assert navigator.find_path("A", "C", "Shortest", "00:10") == ["A", "C"]
+    assert navigator.find_path("A", "C", "Shortest") == ["A", "B", "C"]
+    assert navigator.route_table("Shortest", "00:10") is navigator.route_table("Shortest", "00:20")
+    assert navigator.route_table("Shortest", "00:30") is navigator.route_table("Shortest")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_congested_routes_match_networkx(backend):
+    navigator = CampusNavigator(backend=backend)
+    for departure in ("09:50", "12:25", "18:00"):
+        multipliers = {frozenset(path): multiplier
+                       for path, multiplier in navigator.congestion.get(slot_of(departure), {}).items()}
+        for preference, weight in PREFERENCE_WEIGHTS.items():
+            def cost(u, v, d, weight=weight):
+                value = weight(u, v, d) if callable(weight) else d[weight]
+                return value * multipliers.get(frozenset((u, v)), 1)
+            graph = navigator.graph
+            for start, end in itertools.permutations(graph.nodes, 2):
+                expected = nx.dijkstra_path_length(graph, start, end, weight=cost)
+                try:
+                    route = navigator.find_path(start, end, preference, departure)
+                except NoRoute:
+                    pytest.fail(f"no route from {start} to {end}")
+                walked = sum(cost(a, b, graph[a][b]) for a, b in zip(route, route[1:]))
+                assert walked == pytest.approx(expected), (start, end, preference, departure)
@@ -0,0 +1,109 @@
+import random
+import string
+
+from directory import (
+    EXACT_SCORE, NAME_WEIGHT, PREFIX_SCORE, TYPO_SCORES, Directory, directory_entries, edit_distance, typo_limit,
+    words,
+)
+
+
+def osa_distance(a, b):
+    # Plain optimal-string-alignment distance, without any cut-off.
+    d = [[i + j if not i * j else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[len(a)][len(b)]
+
+
+def misspell(rng, word):
+    for _ in range(rng.randint(0, 3)):
+        i = rng.randrange(len(word) + 1)
+        edit = rng.choice("insert delete replace swap cut".split())
+        if edit == "insert":
+            word = word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+        elif edit == "delete" and len(word) > 1:
+            word = word[:i] + word[i + 1:]
+        elif edit == "replace" and i < len(word):
+            word = word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+        elif edit == "swap" and i + 1 < len(word):
+            word = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+        elif edit == "cut" and i:
+            word = word[:i]
+    return word
+
+
+def match_score(word, indexed):
+    # What one query word scores against one indexed word, by brute force.
+    if indexed.startswith(word):
+        return EXACT_SCORE if indexed == word else PREFIX_SCORE
+    limit = typo_limit(word)
+    distance = osa_distance(word, indexed)
+    return TYPO_SCORES[distance] if limit and distance <= limit else 0
+
+
+def brute_force_search(entries, query):
+    scores = {}
+    for i, entry in enumerate(entries):
+        fields = ((entry.name, NAME_WEIGHT), (entry.kind, 1), (entry.location, 1), (" ".join(entry.facilities), 1))
+        total = 0
+        for word in dict.fromkeys(words(query)):
+            best = max((match_score(word, indexed) * weight
+                        for text, weight in fields for indexed in words(text)), default=0)
+            if not best:
+                break
+            total += best
+        else:
+            scores[i] = total
+    if not words(query):
+        return []
+    ranked = sorted(scores, key=lambda i: (-scores[i], entries[i].kind == "Room", i))
+    return [entries[i].name for i in ranked]
+
+
+def test_edit_distance():
+    rng = random.Random(1)
+    for _ in range(3000):
+        a = "".join(rng.choice("abcde") for _ in range(rng.randint(0, 8)))
+        b = misspell(rng, a) if rng.random() < 0.7 else "".join(rng.choice("abcde") for _ in range(rng.randint(0, 8)))
+        distance = osa_distance(a, b)
+        for limit in (0, 1, 2, 3):
+            if distance <= limit:
+                assert edit_distance(a, b, limit) == distance, (a, b, limit)
+            else:
+                assert edit_distance(a, b, limit) > limit, (a, b, limit)
+
+
+def test_typo_limit():
+    assert [typo_limit(word) for word in ("lab", "labs", "hostel", "hostels", "placement", "cse1", "104")] == \
+        [0, 1, 1, 1, 2, 0, 0]
+
+
+def test_matches_use_every_vocabulary_word_they_should():
+    # The trigram filter must not lose a word within the typo limit.
+    directory = Directory(directory_entries())
+    rng = random.Random(2)
+    queries = [misspell(rng, rng.choice(directory.vocabulary)) for _ in range(500)]
+    queries += ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(1, 9))) for _ in range(100)]
+    for word in filter(None, queries):
+        expected = {i: match_score(word, indexed) for i, indexed in enumerate(directory.vocabulary)}
+        assert directory._find_matches(word) == {i: score for i, score in expected.items() if score}, word
+
+
+def test_search_matches_brute_force():
+    entries = directory_entries()
+    directory = Directory(entries)
+    rng = random.Random(3)
+    queries = ["girls hostle", "cse1 1", "labs", "admin", "", "floor 2 cse1", "mechanical", "zzz"]
+    for _ in range(150):
+        entry = rng.choice(entries)
+        picked = rng.sample(words(" ".join((entry.name, entry.location, *entry.facilities))), rng.randint(1, 2))
+        queries.append(" ".join(misspell(rng, word) for word in picked))
+    for query in queries:
+        assert [entry.name for entry in directory.search(query)] == brute_force_search(entries, query), query
+
+    assert directory.search("girls hostle")[0].name == "Girls Hostel"
+    assert directory.search("cse1 104")[0].name == "CSE1-104"
+    assert len(directory.search("labs", limit=3)) == 3
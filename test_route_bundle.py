@@ -0,0 +1,41 @@
+import itertools
+
+import pytest
+
+from navigator import PREFERENCE_WEIGHTS, CampusNavigator, NoRoute
+from route_bundle import RouteBundle, export_bundle, is_current
+from synthetic_campus import generate_campus
+
+
+def test_bundle_routes_match_navigator(tmp_path):
+    buildings, paths, coordinates = generate_campus(60, seed=4)
+    for navigator in (CampusNavigator(), CampusNavigator(buildings, paths, coordinates=coordinates)):
+        path = tmp_path / "campus.routes"
+        export_bundle(path, navigator)
+        places = list(navigator.buildings) + [n for n in navigator.csr.nodes if n not in navigator.buildings]
+        with RouteBundle(path, fingerprint=navigator.fingerprint) as bundle:
+            for start, end in itertools.product(places, repeat=2):
+                for preference in PREFERENCE_WEIGHTS:
+                    try:
+                        expected = navigator.find_path(start, end, preference).as_dict()
+                    except NoRoute:
+                        expected = None
+                    assert bundle.route(start, end, preference) == expected, (start, end, preference)
+
+
+def test_bundle_rejects_unknown_and_stale(tmp_path):
+    path = tmp_path / "campus.routes"
+    export_bundle(path, CampusNavigator())
+    with RouteBundle(path) as bundle:
+        assert is_current(bundle)
+        with pytest.raises(KeyError):
+            bundle.route("Gate", "Nowhere")
+        with pytest.raises(KeyError):
+            bundle.route("Gate", "CSE1", "Scenic")
+    with pytest.raises(ValueError):
+        RouteBundle(path, fingerprint="0" * 40)
+
+    buildings, paths, coordinates = generate_campus(10)
+    export_bundle(path, CampusNavigator(buildings, paths, coordinates=coordinates))
+    with RouteBundle(path) as bundle:
+        assert not is_current(bundle)
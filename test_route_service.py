@@ -0,0 +1,47 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from route_service import make_server
+
+
+@pytest.fixture
+def service(request):
+    # A csr-backed service has a navigator of its own, so path updates do
+    # not leak into the shared one.
+    server = make_server(port=0, backend="csr", allow_path_updates=request.param)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    conn = http.client.HTTPConnection(*server.server_address[:2])
+
+    def call(method, target, body=None):
+        conn.request(method, target, None if body is None else json.dumps(body))
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+
+    yield call
+    conn.close()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("service", [False], indirect=True)
+def test_path_updates_are_off_by_default(service):
+    status, _ = service("POST", "/paths", {"start": "Gate", "end": "Placements", "closed": True})
+    assert status == 403
+    assert service("GET", "/route?start=Gate&end=Placements")[1]["path"] == ["Gate", "Placements"]
+
+
+@pytest.mark.parametrize("service", [True], indirect=True)
+def test_path_updates_take_only_booleans(service):
+    for body in ({"closed": "false"}, {"closed": 0}, {"covered": None}, {"covered": "yes"}):
+        status, _ = service("POST", "/paths", dict(body, start="Gate", end="Placements"))
+        assert status == 400, body
+    assert service("GET", "/route?start=Gate&end=Placements")[1]["path"] == ["Gate", "Placements"]
+
+    status, _ = service("POST", "/paths", {"start": "Gate", "end": "Placements", "closed": True})
+    assert status == 200
+    assert service("GET", "/route?start=Gate&end=Placements")[1]["path"] == [
+        "Gate", "Basketball Court", "Placements",
+    ]
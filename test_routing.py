@@ -0,0 +1,331 @@
+"""Routing invariants, checked against networkx and brute force.
+
+Run with ``python -m pytest -q``.
+"""
+import itertools
+import pickle
+import random
+from itertools import islice
+
+import networkx as nx
+import pytest
+
+from campus_data import building_layout
+from navigator import BACKENDS, PREFERENCE_WEIGHTS, CampusNavigator, NoRoute, RouteTable, no_path
+from synthetic_campus import generate_campus
+
+
+def random_paths(rng, nodes, edges):
+    paths = {}
+    for _ in range(edges):
+        a, b = rng.sample(range(nodes), 2)
+        paths[(f"n{a}", f"n{b}")] = {"distance": rng.randint(1, 6), "covered": rng.random() < 0.5}
+    return paths
+
+
+def find_or_none(navigator, start, end, preference, departure=None):
+    try:
+        return navigator.find_path(start, end, preference, departure)
+    except NoRoute:
+        return None
+
+
+def networkx_cost(graph, preference):
+    # A networkx "weight" attribute holding the preference's edge cost.
+    weight = PREFERENCE_WEIGHTS[preference]
+    for a, b, attrs in graph.edges(data=True):
+        attrs["_cost"] = weight(a, b, attrs) if callable(weight) else attrs[weight]
+    return "_cost"
+
+
+def path_cost(graph, path, weight):
+    return sum(graph[a][b][weight] for a, b in zip(path, path[1:]))
+
+
+@pytest.mark.parametrize("backend", ["table", "csr"])
+def test_paths_match_networkx(backend):
+    # Equal-cost paths may be broken differently, so compare costs.
+    navigators = [CampusNavigator(backend=backend)]
+    rng = random.Random(1)
+    for _ in range(20):
+        navigators.append(CampusNavigator({}, random_paths(rng, rng.randint(2, 40), rng.randint(1, 100)),
+                                          backend=backend))
+    for navigator in navigators:
+        graph = navigator.graph.copy()
+        for preference in ("Shortest", "Covered"):
+            weight = networkx_cost(graph, preference)
+            for start, end in islice(itertools.permutations(graph.nodes, 2), 300):
+                try:
+                    expected = nx.dijkstra_path_length(graph, start, end, weight=weight)
+                except nx.NetworkXNoPath:
+                    expected = None
+                path = find_or_none(navigator, start, end, preference)
+                if path is not None:
+                    assert path[0] == start and path[-1] == end
+                    path = path_cost(graph, path, weight)
+                assert path == expected, (start, end, preference)
+
+
+def test_repaired_tables_match_fresh_build():
+    buildings, paths, coordinates = generate_campus(120, seed=1)
+    busy = next(iter(paths))
+    congestion = {60: {busy: 2.5}}
+    departures = (None, "10:00")
+    navigator = CampusNavigator(buildings, paths, coordinates=coordinates, congestion=congestion)
+    for preference in PREFERENCE_WEIGHTS:
+        for departure in departures:
+            navigator.route_table(preference, departure)
+        for facility in navigator.facility_index.holders:
+            navigator.facility_index.table(facility, preference)
+
+    rng = random.Random(1)
+    for _ in range(30):
+        start, end = rng.choice(list(paths))
+        change = rng.choice([{"closed": True}, {"closed": False}, {"covered": True}, {"covered": False}])
+        navigator.update_path(start, end, **change)
+
+        fresh = CampusNavigator(buildings, navigator.paths, coordinates=coordinates, congestion=congestion)
+        assert fresh.fingerprint == navigator.fingerprint
+        assert list(fresh.components) == list(navigator.components)
+        for preference in PREFERENCE_WEIGHTS:
+            for departure in departures:
+                # Repaired in place of the old table, not rebuilt on demand.
+                assert navigator.route_table_ready(preference, departure)
+                repaired = navigator.route_table(preference, departure)
+                rebuilt = RouteTable.build(fresh.csr, fresh._slot_weight(preference, departure)[1])
+                assert repaired.next_hop == rebuilt.next_hop, (start, end, change, preference, departure)
+                assert repaired.dist == rebuilt.dist, (start, end, change, preference, departure)
+            for facility in navigator.facility_index.holders:
+                repaired = navigator.facility_index.tables[(facility, preference)]
+                assert repaired == fresh.facility_index.table(facility, preference), (facility, preference)
+
+
+def astar_cases():
+    yield CampusNavigator(backend="astar")
+    for size, seed in ((50, 1), (200, 2)):
+        buildings, paths, coordinates = generate_campus(size, seed=seed)
+        yield CampusNavigator(buildings, paths, backend="astar", coordinates=coordinates)
+    rng = random.Random(3)
+    for _ in range(30):
+        paths = random_paths(rng, rng.randint(2, 25), rng.randint(1, 60))
+        # Positions unrelated to the path lengths (some shared) still give
+        # an admissible heuristic once scaled.
+        nodes = {node for path in paths for node in path}
+        coordinates = {node: (rng.randint(0, 20), rng.randint(0, 20)) for node in nodes}
+        yield CampusNavigator({}, paths, backend="astar", coordinates=coordinates)
+
+
+def test_astar_matches_networkx():
+    for navigator in astar_cases():
+        graph = navigator.graph.copy()
+        for preference in PREFERENCE_WEIGHTS:
+            weight = networkx_cost(graph, preference)
+            for start, end in islice(itertools.permutations(graph.nodes, 2), 400):
+                try:
+                    expected = nx.dijkstra_path_length(graph, start, end, weight=weight)
+                except nx.NetworkXNoPath:
+                    expected = None
+                path = find_or_none(navigator, start, end, preference)
+                assert (path and path_cost(graph, path, weight)) == expected, (start, end, preference)
+
+
+def slot_cost(navigator, route, preference, departure):
+    # Cost of ``route`` as searched: the preference's edge costs, congested
+    # as at ``departure``.
+    weight = navigator._slot_weight(preference, departure)[1]
+    return sum(weight[navigator.csr.edge_slots(leg.edge)[0]] for leg in route.legs)
+
+
+def test_astar_matches_dijkstra_with_congestion_and_updates():
+    astar, csr = CampusNavigator(backend="astar"), CampusNavigator(backend="csr")
+    pairs = list(itertools.permutations(csr.csr.nodes, 2))
+    # Covering a path makes it cheaper for Covered routes, which can break a
+    # heuristic that is not rescaled.
+    for start, end in [("Gate", "Basketball Court"), ("Boys Hostel", "Sports Area"), ("CAI", "Bus Area")]:
+        for navigator in (astar, csr):
+            navigator.set_covered(start, end, True)
+        for preference in PREFERENCE_WEIGHTS:
+            for departure in (None, "09:50", "13:00"):
+                for a, b in pairs:
+                    expected = find_or_none(csr, a, b, preference, departure)
+                    found = find_or_none(astar, a, b, preference, departure)
+                    assert (found is None) == (expected is None), (a, b)
+                    if found is not None:
+                        assert slot_cost(astar, found, preference, departure) == pytest.approx(
+                            slot_cost(csr, expected, preference, departure)), (a, b, preference, departure)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_find_routes_matches_find_path(backend):
+    navigator = CampusNavigator(backend=backend)
+    places = list(navigator.buildings) + ["CSE1-104", "CSE1-212", "ECE2-001", "Pharmacy-105"]
+    pairs = list(itertools.product(places, repeat=2))
+    for preference in PREFERENCE_WEIGHTS:
+        for departure in (None, "09:50"):
+            routes = navigator.find_routes(pairs, preference, departure)
+            for (start, end), route in zip(pairs, routes):
+                expected = find_or_none(navigator, start, end, preference, departure)
+                assert (route is None) == (expected is None), (start, end, preference, departure)
+                if route is None:
+                    continue
+                assert route.start == start and route.end == end
+                if start in navigator.rooms or end in navigator.rooms:
+                    assert route == expected
+                else:
+                    # A batch may settle ties differently (astar runs Dijkstra).
+                    assert slot_cost(navigator, route, preference, departure) == pytest.approx(
+                        slot_cost(navigator, expected, preference, departure)), (start, end)
+
+            stops = ["Gate", "CSE1-104", "AIML", "Canteen", "Boys Hostel"]
+            legs = navigator.find_itinerary(stops, preference, departure)
+            assert legs == navigator.find_routes(list(zip(stops, stops[1:])), preference, departure)
+
+
+def random_navigators(seed, trials, nodes, edges):
+    rng = random.Random(seed)
+    for _ in range(trials):
+        yield CampusNavigator({}, random_paths(rng, rng.randint(*nodes), rng.randint(*edges)), backend="csr")
+
+
+def pareto_front(graph, start, end):
+    costs = set()
+    for path in nx.all_simple_paths(graph, start, end):
+        legs = [graph[a][b] for a, b in zip(path, path[1:])]
+        costs.add((sum(leg["distance"] for leg in legs),
+                   sum(leg["distance"] for leg in legs if not leg["covered"])))
+    return sorted(c for c in costs if not any(o != c and o[0] <= c[0] and o[1] <= c[1] for o in costs))
+
+
+def test_pareto_routes_match_brute_force():
+    navigators = [CampusNavigator()] + list(random_navigators(5, 80, (2, 9), (1, 18)))
+    for navigator in navigators:
+        for start, end in itertools.permutations(navigator.csr.nodes, 2):
+            if not navigator.connected(start, end):
+                continue
+            front = [(route.distance, route.distance - route.covered)
+                     for route in navigator.pareto_routes(start, end)]
+            assert front == pareto_front(navigator.graph, start, end), (start, end)
+
+
+def test_alternatives_match_networkx_simple_paths():
+    campus = CampusNavigator()
+    cases = [(campus, preference, 4) for preference in ("Shortest", "Covered")]
+    cases += [(navigator, "Shortest", 6) for navigator in random_navigators(7, 60, (3, 12), (2, 30))]
+    for navigator, preference, k in cases:
+        graph = navigator.graph.copy()
+        weight = networkx_cost(graph, preference)
+        for start, end in islice(itertools.permutations(navigator.csr.nodes, 2), 60):
+            if not navigator.connected(start, end):
+                continue
+            routes = navigator.alternative_routes(start, end, preference, k)
+            expected = [path_cost(graph, path, weight)
+                        for path in islice(nx.shortest_simple_paths(graph, start, end, weight=weight), k)]
+            assert [path_cost(graph, route, weight) for route in routes] == expected, (start, end, preference)
+            assert path_cost(graph, navigator.find_path(start, end, preference), weight) == expected[0]
+            assert all(len(set(route)) == len(route) for route in routes)
+            assert len({tuple(route) for route in routes}) == len(routes)
+            assert navigator.alternative_routes(start, end, preference, k) == routes
+
+
+def test_nearest_facility_matches_networkx():
+    buildings, paths, coordinates = generate_campus(150, seed=6)
+    for navigator in (CampusNavigator(), CampusNavigator(buildings, paths, coordinates=coordinates)):
+        graph = navigator.graph.copy()
+        holders = navigator.facility_index.holders
+        for preference in PREFERENCE_WEIGHTS:
+            weight = networkx_cost(graph, preference)
+            for start in navigator.buildings:
+                lengths = nx.single_source_dijkstra_path_length(graph, start, weight=weight) \
+                    if start in graph else {start: 0}
+                for facility, names in holders.items():
+                    route = navigator.nearest_facility(start, facility.upper(), preference)
+                    reachable = [lengths[name] for name in names if name in lengths]
+                    if not reachable:
+                        assert route is None, (start, facility)
+                        continue
+                    assert route.start == start and route.end in names, (start, facility)
+                    assert path_cost(graph, route, weight) == min(reachable), (start, facility, preference)
+
+    with pytest.raises(ValueError):
+        navigator.nearest_facility("B0", "Swimming Pool", "Shortest")
+    with pytest.raises(nx.NodeNotFound):
+        navigator.nearest_facility("Nowhere", "Labs", "Shortest")
+
+
+def indoor_graph(navigator):
+    # Campus and floor plans as one networkx graph, rooms included.
+    graph = navigator.graph.copy()
+    for layout in navigator.indoor.values():
+        for (a, b), attrs in layout["paths"].items():
+            graph.add_edge(a, b, **attrs)
+        for room, (door, distance) in layout["rooms"].items():
+            graph.add_edge(room, door, distance=distance, covered=True)
+    return graph
+
+
+def test_room_routes_match_networkx():
+    buildings = {name: {"location": "", "facilities": []} for name in ("A", "B", "C")}
+    paths = {("A", "B"): {"distance": 30, "covered": False}, ("B", "C"): {"distance": 20, "covered": True}}
+    small = CampusNavigator(buildings, paths, indoor={
+        "A": building_layout("A", 3, 5), "B": building_layout("B", 1, 2, pitch=7), "C": building_layout("C", 2, 1),
+    })
+    campus = CampusNavigator()
+    rng = random.Random(8)
+    for navigator in (small, campus):
+        graph = indoor_graph(navigator)
+        places = list(navigator.rooms) + list(navigator.buildings)
+        pairs = list(itertools.product(places, repeat=2))
+        if len(pairs) > 3000:
+            pairs = rng.sample(pairs, 3000)
+        for preference, weight in PREFERENCE_WEIGHTS.items():
+            def cost(u, v, d, weight=weight):
+                value = weight(u, v, d) if callable(weight) else d[weight]
+                return None if value == float("inf") else value
+            for start, end in pairs:
+                if start not in graph or end not in graph:
+                    expected = 0 if start == end else None
+                else:
+                    try:
+                        expected = nx.dijkstra_path_length(graph, start, end, weight=cost)
+                    except nx.NetworkXNoPath:
+                        expected = None
+                route = find_or_none(navigator, start, end, preference)
+                if route is None:
+                    assert expected is None, (start, end, preference)
+                    continue
+                assert route.start == start and route.end == end
+                walked = sum(cost(a, b, graph[a][b]) for a, b in zip(route, route[1:]))
+                assert walked == pytest.approx(expected), (start, end, preference)
+                assert [(leg.start, leg.end) for leg in route.legs] == list(zip(route, route[1:]))
+                assert route.distance == sum(graph[a][b]["distance"] for a, b in zip(route, route[1:]))
+                assert route.covered == sum(graph[a][b]["distance"] for a, b in zip(route, route[1:])
+                                            if graph[a][b]["covered"])
+
+
+def test_backends_agree_on_step_free_routes():
+    buildings = {name: {"location": "", "facilities": []} for name in "ABCD"}
+    paths = {
+        ("A", "B"): {"distance": 5, "covered": True, "stairs": True},
+        ("B", "C"): {"distance": 5, "covered": True},
+    }
+    coordinates = {"A": (0, 0), "B": (5, 0), "C": (10, 0), "D": (0, 9)}
+    congestion = {60: {("B", "C"): 2}}
+    for backend in BACKENDS:
+        navigator = CampusNavigator(buildings, paths, backend=backend, coordinates=coordinates,
+                                    congestion=congestion)
+        for departure in (None, "10:00"):
+            assert navigator.find_path("A", "C", "Shortest", departure) == ["A", "B", "C"]
+            with pytest.raises(NoRoute):
+                navigator.find_path("A", "C", "Wheelchair", departure)
+            with pytest.raises(NoRoute):
+                navigator.find_path("A", "D", "Shortest", departure)
+            pairs = [("A", "C"), ("B", "C"), ("A", "D")]
+            routes = navigator.find_routes(pairs, "Wheelchair", departure)
+            assert [None if route is None else list(route) for route in routes] == [None, ["B", "C"], None]
+        with pytest.raises(ValueError):
+            navigator.find_path("A", "C", "Scenic")
+
+
+def test_no_route_pickles():
+    error = pickle.loads(pickle.dumps(no_path("A", "B")))
+    assert type(error) is NoRoute and str(error) == "No path between A and B."